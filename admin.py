@@ -0,0 +1,334 @@
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, abort, Response, stream_with_context, send_file
+from models import Customer, Professional, db, Service
+import queries
+import stats
+import pagination
+import search
+import identity
+import transitions
+import exports
+import bulk_import
+import jobs
+import documents
+import fragments
+import matching
+from routes import login_required, admin_required, chart_url
+import os
+from datetime import datetime
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/admin_dashboard', methods=['GET', 'POST'])
+def admin_dashboard():
+    if request.method == 'POST':
+        try:
+            service_request_id = request.form.get('service_request_id', type=int)
+            action = request.form.get('action')
+
+            if action in ('accept', 'reject') and transitions.review([service_request_id], action):
+                db.session.commit()
+                flash(f"Service request {action}ed successfully.", "success")
+            else:
+                db.session.rollback()
+                flash("Service request not found.", "danger")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"An error occurred: {e}", "danger")
+
+        return redirect(url_for('admin.admin_dashboard'))
+
+    return render_template('admin_dashboard.html')
+
+@bp.route('/admin_search', methods=['GET', 'POST'])
+def admin_search():
+    services = None
+    search_input = request.values.get('search_input')
+    terms = request.values.get('q')
+
+    query = Service.query
+    if search_input:
+        query = query.filter_by(name=search_input)
+
+    if terms:
+        services = search.ranked(query, terms)
+    elif search_input:
+        services = pagination.paginate(query, Service.id)
+
+    return render_template('admin_search.html', services=services, search_input=search_input, terms=terms)
+
+@bp.route('/admin_service_view/<int:service_id>', methods=['GET', 'POST'])
+def admin_service_view(service_id):
+    service = queries.services_with_people().filter(Service.id == service_id).first_or_404()
+
+    if request.method == 'POST':
+        if transitions.close([service.id]):
+            db.session.commit()
+            flash('Service has been closed successfully.', 'success')
+            return redirect(url_for('admin.admin_service_view', service_id=service.id))
+
+    suggested_professionals = matching.professionals_for(service, limit=5) if service.status == 'requested' and not service.professional_id else []
+    return render_template('admin_service_view.html', service=service, suggested_professionals=suggested_professionals)
+
+@bp.route('/admin_summary')
+def admin_summary():
+    service_counts, avg_rating = stats.name_stats()
+    ratings_plot = None
+    if avg_rating:
+        ratings_plot = chart_url('rating_bar', {'title': 'Overall Customer Ratings', 'avg_rating': round(avg_rating, 2)})
+
+    services_plot = None
+    if service_counts:
+        services_plot = chart_url('type_bar', [[name, count] for name, count in service_counts])
+
+    return render_template('admin_summary.html', 
+                           ratings_plot=ratings_plot, 
+                           services_plot=services_plot, 
+                           avg_rating=avg_rating, 
+                           service_counts=service_counts)
+
+@bp.route('/export/<table>.<fmt>')
+@admin_required
+def export(table, fmt):
+    if table not in exports.TABLES or fmt not in exports.FORMATS:
+        abort(404)
+
+    filters = {key: request.args.get(key) for key in ('status', 'name', 'date_from', 'date_to', 'role')}
+    response = Response(stream_with_context(exports.generate(table, fmt, **filters)), mimetype=exports.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={table}.{fmt}'
+    return response
+
+@bp.route('/admin_import', methods=['GET', 'POST'])
+@admin_required
+def admin_import():
+    if request.method == 'POST':
+        kind = request.form.get('kind')
+        upload = request.files.get('file')
+
+        if kind not in bulk_import.KINDS or not upload or not upload.filename:
+            flash("Choose what to import and a CSV or NDJSON file.", "danger")
+            return redirect(url_for('admin.admin_import'))
+
+        fmt = 'ndjson' if upload.filename.endswith(('.ndjson', '.jsonl')) else 'csv'
+        try:
+            report = bulk_import.run_import(kind, upload.stream, fmt, created_by=session.get('user_id'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f"An error occurred: {e}", "danger")
+            return redirect(url_for('admin.admin_import'))
+
+        flash(f"{report.inserted} rows imported, {report.failed} rejected.", "success" if not report.failed else "warning")
+        return render_template('admin_import.html', kinds=bulk_import.KINDS, report=report)
+
+    return render_template('admin_import.html', kinds=bulk_import.KINDS, report=None)
+
+@bp.route('/jobs/rebuild_rollups', methods=['POST'])
+@admin_required
+def rebuild_rollups_job():
+    job_id = jobs.enqueue('rebuild_rollups', created_by=session.get('user_id'))
+    db.session.commit()
+    return jsonify({'id': job_id, 'status_url': url_for('core.job_status', job_id=job_id)}), 202
+
+@bp.route('/professional_document/<int:professional_id>')
+@login_required
+def professional_document(professional_id):
+    user = identity.current_user()
+    if user.role != 'admin' and user.id != professional_id:
+        abort(404)
+    professional = Professional.query.get(professional_id)
+    if not professional or not professional.documents:
+        abort(404)
+
+    path = documents.resolve(professional.documents)
+    if not os.path.exists(path):
+        abort(404)
+    # conditional=True gives If-None-Match/If-Modified-Since and Range
+    # support. Stored documents never change, so their hash is the ETag.
+    response = send_file(path, mimetype='application/pdf', conditional=True, etag=professional.documents,
+                         download_name=f'professional-{professional_id}.pdf', max_age=86400)
+    response.cache_control.private = True
+    return response
+
+@bp.route('/manage_services', methods=['GET', 'POST'])
+def manage_services():
+    if request.method == 'POST':
+        service_id = request.form.get('service_id')
+        service = Service.query.get(service_id)
+        
+        if service and service.status in ['In Progress', 'Requested']:
+            service.status = 'Closed'
+            db.session.commit()
+            flash("Service has been closed successfully.", "success")
+        
+        return redirect(url_for('admin.manage_services'))
+
+    # Versions first, so the fragment is never stored under a newer version
+    # than the rows it shows.
+    fragments.data_version('service')
+    services = pagination.paginate(Service.query, Service.id)
+    return render_template('manage_services.html', services=services)
+
+@bp.route('/manage_requests', methods=['GET', 'POST'])
+def manage_requests():
+    if request.method == 'POST':
+        service_id = request.form.get('service_id', type=int)
+        price = request.form.get('price', type=float)
+        action = request.form.get('action')
+
+        if action in ('approve', 'reject') and transitions.review([service_id], action, price=price):
+            db.session.commit()
+
+            flash(f"Service ID {service_id} has been {action} successfully!", "success")
+
+    services = pagination.paginate(Service.query.filter_by(status='pending'), Service.id)
+
+    return render_template('manage_requests.html', services=services)
+
+@bp.route('/manage_requests/bulk', methods=['POST'])
+@admin_required
+def bulk_requests():
+    service_ids = request.form.getlist('service_ids', type=int)
+    action = request.form.get('action')
+    price = request.form.get('price', type=float)
+
+    if not service_ids or action not in ('approve', 'reject'):
+        flash("Select at least one request and an action.", "danger")
+        return redirect(url_for('admin.manage_requests'))
+
+    values = {'price': price} if price is not None else {}
+    try:
+        changed = transitions.review(service_ids, action, **values)
+        db.session.commit()
+        flash(f"{len(changed)} of {len(service_ids)} requests have been {action}d.", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"An error occurred: {e}", "danger")
+
+    return redirect(url_for('admin.manage_requests'))
+
+@bp.route('/manage_professionals', methods=['GET'])
+def manage_professionals():
+    fragments.data_version('professional', 'user')
+    pending_professionals = pagination.paginate(queries.professionals_by_status('pending'), Professional.id, prefix='pending_')
+    approved_professionals = pagination.paginate(queries.professionals_by_status('approved'), Professional.id, prefix='approved_')
+
+    return render_template('manage_professionals.html', 
+                           pending_professionals=pending_professionals,
+                           approved_professionals=approved_professionals)
+
+@bp.route('/manage_professionals/bulk', methods=['POST'])
+@admin_required
+def bulk_professionals():
+    professional_ids = request.form.getlist('professional_ids', type=int)
+    action = request.form.get('action')
+
+    if not professional_ids or action not in transitions.PROFESSIONAL_ACTIONS:
+        flash("Select at least one professional and an action.", "danger")
+        return redirect(url_for('admin.manage_professionals'))
+
+    try:
+        changed = transitions.set_professional_status(professional_ids, action)
+        db.session.commit()
+        for professional_id in changed:
+            identity.invalidate(professional_id)
+        flash(f"{len(changed)} of {len(professional_ids)} professionals updated.", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"An error occurred: {e}", "danger")
+
+    return redirect(url_for('admin.manage_professionals'))
+
+@bp.route('/delete_professional/<int:professional_id>', methods=['GET'])
+def delete_professional(professional_id):
+    professional = Professional.query.get(professional_id)
+    if professional:
+        professional.status = 'blocked'
+        db.session.commit()
+        identity.invalidate(professional_id)
+        flash("Professional has been blocked successfully.", "success")
+    else:
+        flash("Professional not found.", "danger")
+    
+    return redirect(url_for('admin.manage_professionals'))
+
+@bp.route('/manage_customers', methods=['GET'])
+def manage_customers():
+    customers = pagination.paginate(queries.customers_with_users(), Customer.id)
+    return render_template('manage_customers.html', customers=customers)
+
+@bp.route('/delete_customer/<int:customer_id>', methods=['POST'])
+def delete_customer(customer_id):
+    try:
+        customer = Customer.query.get(customer_id)
+        if customer:
+            db.session.delete(customer)
+            db.session.commit()
+            identity.invalidate(customer_id)
+            flash("Customer deleted successfully.", "success")
+        else:
+            flash("Customer not found.", "danger")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"An error occurred: {e}", "danger")
+
+    return redirect(url_for('admin.manage_customers'))
+
+@bp.route('/new_service', methods=['GET', 'POST'])
+def new_service():
+    if request.method == 'POST':
+        admin_id = session.get('user_id')
+        
+        if not admin_id:
+            return redirect(url_for('auth.login'))
+        
+        service_name = request.form['service_name']
+        description = request.form['description']
+        base_price = request.form['base_price']
+        address = request.form['address']
+        
+        new_service = Service(
+            name=service_name,
+            price=float(base_price),
+            description=description,
+            address=address,
+            status='created',
+            created_by=admin_id,
+            date_created=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+
+        db.session.add(new_service)
+        db.session.commit()
+
+        return redirect(url_for('admin.admin_dashboard'))
+
+    return render_template('new_service.html')
+
+@bp.route('/end_service/<int:service_id>', methods=['POST'])
+def end_service(service_id):
+    if transitions.close([service_id], ['inprogress', 'requested']):
+        db.session.commit()
+        flash("Service has been closed successfully.", "success")
+    
+    return redirect(url_for('admin.manage_services'))
+
+@bp.route('/end_service/bulk', methods=['POST'])
+@admin_required
+def bulk_end_services():
+    service_ids = request.form.getlist('service_ids', type=int)
+    if service_ids:
+        changed = transitions.close(service_ids, ['inprogress', 'requested'])
+        db.session.commit()
+        flash(f"{len(changed)} of {len(service_ids)} services have been closed.", "success")
+
+    return redirect(url_for('admin.manage_services'))
+
+@bp.route('/approve_professional/<int:professional_id>/<action>', methods=['GET'])
+def approve_professional(professional_id, action):
+    professional = Professional.query.get(professional_id)
+    if professional:
+        if action == 'accept':
+            professional.status = 'approved'
+        elif action == 'reject':
+            professional.status = 'rejected'
+        db.session.commit()
+        identity.invalidate(professional_id)
+    return redirect(url_for('admin.manage_professionals'))
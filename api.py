@@ -0,0 +1,185 @@
+import hashlib
+from datetime import timezone
+
+from flask import Blueprint, request, jsonify, make_response
+from sqlalchemy import func
+from models import db, Service, ServiceRollup, ProfessionalRollup
+import identity
+import pagination
+import queries
+import stats
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Compact serializers: every field is one getter, and ?fields=a,b limits the
+# response to those keys.
+SERVICE_FIELDS = {
+    'id': lambda service: service.id,
+    'name': lambda service: service.name,
+    'price': lambda service: service.price,
+    'description': lambda service: service.description,
+    'address': lambda service: service.address,
+    'status': lambda service: service.status,
+    'date_created': lambda service: service.date_created,
+    'customer_id': lambda service: service.customer_id,
+    'professional_id': lambda service: service.professional_id,
+    'rating': lambda service: service.rating,
+    'remarks': lambda service: service.remarks,
+    'updated_at': lambda service: service.updated_at.isoformat() if service.updated_at else None,
+}
+
+CUSTOMER_FIELDS = {
+    'name': lambda user: user.name,
+    'address': lambda user: user.address,
+    'pincode': lambda user: user.pincode,
+    'mobile': lambda user: user.mobile,
+}
+
+
+def error(message, status):
+    return jsonify({'error': message}), status
+
+
+def selected_fields(available):
+    fields = request.args.get('fields')
+    if not fields:
+        return list(available)
+    return [field for field in fields.split(',') if field in available]
+
+
+def serialize(obj, available, fields):
+    return {field: available[field](obj) for field in fields}
+
+
+def version(query):
+    # count, max(updated_at) and max(id) over the same filter change on
+    # insert, update and delete, and are answered without loading any rows.
+    count, updated_at, max_id = query.with_entities(
+        func.count(Service.id), func.max(Service.updated_at), func.max(Service.id)
+    ).order_by(None).one()
+    raw = f"{request.full_path}|{count}|{updated_at}|{max_id}"
+    last_modified = updated_at.replace(tzinfo=timezone.utc, microsecond=0) if updated_at else None
+    return hashlib.sha1(raw.encode('utf8')).hexdigest(), last_modified
+
+
+def rollup_version(model, *conditions):
+    # For bodies computed from the rollups: their few rows change whenever
+    # the summary does, without a pass over the services.
+    table = model.__table__
+    rows = db.session.query(*table.columns).filter(*conditions).order_by(*table.primary_key.columns).all()
+    raw = f"{request.full_path}|{[tuple(row) for row in rows]}"
+    return hashlib.sha1(raw.encode('utf8')).hexdigest(), None
+
+
+def not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    return bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+
+
+def conditional(validator, build):
+    etag, last_modified = validator
+    if not_modified(etag, last_modified):
+        response = make_response('', 304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def page_body(page, serialize_item):
+    return {
+        'items': [serialize_item(item) for item in page],
+        'next': page.next_url() if page.has_next else None,
+        'prev': page.prev_url() if page.has_prev else None,
+    }
+
+
+def current_user(role=None):
+    user = identity.current_user()
+    if not user or (role and user.role != role):
+        return None
+    return user
+
+
+@bp.route('/services')
+def services():
+    query = Service.query.filter(Service.customer_id == None)
+    category = request.args.get('category')
+    if category:
+        query = query.filter(Service.name == category)
+
+    fields = selected_fields(SERVICE_FIELDS)
+    return conditional(version(query), lambda: page_body(
+        pagination.paginate(query, Service.id),
+        lambda service: serialize(service, SERVICE_FIELDS, fields)
+    ))
+
+
+@bp.route('/bookings')
+def bookings():
+    customer = current_user('customer')
+    if not customer:
+        return error("Customer login required.", 401)
+
+    query = Service.query.filter(Service.customer_id == customer.id)
+    status = request.args.get('status')
+    if status:
+        query = query.filter(Service.status == status)
+
+    fields = selected_fields(SERVICE_FIELDS)
+    return conditional(version(query), lambda: page_body(
+        pagination.paginate(query, Service.id),
+        lambda service: serialize(service, SERVICE_FIELDS, fields)
+    ))
+
+
+@bp.route('/queue/<queue>')
+def professional_queue(queue):
+    professional = current_user('professional')
+    if not professional:
+        return error("Professional login required.", 401)
+    if queue not in queries.PROFESSIONAL_QUEUES:
+        return error(f"Unknown queue, expected one of {', '.join(queries.PROFESSIONAL_QUEUES)}.", 404)
+
+    query = queries.professional_queue(professional, queue)
+    fields = selected_fields(SERVICE_FIELDS)
+    customer_fields = list(CUSTOMER_FIELDS) if 'customer' in request.args.get('fields', 'customer').split(',') else []
+
+    def item(row):
+        service, customer = row
+        body = serialize(service, SERVICE_FIELDS, fields)
+        if customer_fields:
+            body['customer'] = serialize(customer, CUSTOMER_FIELDS, customer_fields)
+        return body
+
+    return conditional(version(query), lambda: page_body(
+        pagination.paginate(query, Service.id, key=lambda row: row[0].id),
+        item
+    ))
+
+
+@bp.route('/summary')
+def summary():
+    user = current_user()
+    if not user:
+        return error("Login required.", 401)
+
+    if user.role == 'customer':
+        validator = version(Service.query.filter(Service.customer_id == user.id))
+        build = lambda: stats.service_stats(customer_id=user.id)
+    elif user.role == 'professional':
+        validator = rollup_version(ProfessionalRollup, ProfessionalRollup.professional_id == user.id)
+        build = lambda: stats.professional_stats(user.id)
+    else:
+        validator = rollup_version(ServiceRollup)
+
+        def build():
+            service_counts, avg_rating = stats.name_stats()
+            return {'avg_rating': avg_rating, 'service_counts': dict(service_counts)}
+
+    return conditional(validator, build)
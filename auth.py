@@ -0,0 +1,168 @@
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, session, flash
+from models import User, Customer, Professional, db
+import jobs
+import passwords
+import documents
+
+bp = Blueprint('auth', __name__)
+
+@bp.route('/register')
+def register():
+    return render_template('register.html')
+
+@bp.route('/customer_signup', methods=['GET', 'POST'])
+def customer_signup():
+    if request.method == 'POST':
+        name = request.form['name']
+        email = request.form['email']
+        password = request.form['password']
+        mobile = request.form['mobile']
+        address = request.form['address']
+        pincode = request.form['pincode']
+
+        try:
+            user = User(
+                name=name,
+                email=email,
+                password=passwords.hash_password(password),
+                role='customer',
+                mobile=mobile,
+                address=address,
+                pincode=pincode
+            )
+            db.session.add(user)
+            db.session.commit()
+
+            customer = Customer(id=user.id)
+            db.session.add(customer)
+            db.session.commit()
+
+            flash("Customer account created successfully!", "success")
+            return redirect(url_for('auth.login')) 
+
+        except Exception as e:
+            db.session.rollback() 
+            flash(f"An error occurred: {str(e)}", "danger")
+            return redirect(url_for('auth.customer_signup'))
+
+    return render_template('customer_signup.html')
+
+ALLOWED_EXTENSIONS = {'pdf'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+@bp.route('/professional_signup', methods=['GET', 'POST'])
+def professional_signup():
+    if request.method == 'POST':
+        # Checked before request.form parses the body, which Werkzeug spools
+        # to a temporary file first. Without a Content-Length (a chunked
+        # upload) the size would only be known once all of it was spooled.
+        max_bytes = current_app.config['DOCUMENT_MAX_BYTES']
+        if request.content_length is None:
+            flash("The upload was sent without a Content-Length, please try again.", "danger")
+            return redirect(request.url)
+        if request.content_length > max_bytes + 64 * 1024:
+            flash(f"Documents may be at most {max_bytes // (1024 * 1024)} MB.", "danger")
+            return redirect(request.url)
+
+        document = stored = None
+        try:
+            name = request.form['name']
+            email = request.form['email']
+            password = request.form['password']
+            mobile = request.form['mobile']
+            service_domain = request.form['service_domain']
+            experience = request.form['experience']
+            address = request.form['address']
+            pincode = request.form['pincode']
+
+            file = request.files.get('documents')
+            if file and allowed_file(file.filename):
+                document, stored = documents.store(file.stream)
+            else:
+                flash("Invalid file type or no file uploaded. Only PDF files are allowed.", "error")
+                return redirect(request.url)
+
+            user = User(
+                name=name,
+                email=email,
+                password=passwords.hash_password(password),
+                role='professional',
+                mobile=mobile,
+                address=address,
+                pincode=pincode,
+            )
+            db.session.add(user)
+            db.session.flush()
+
+            professional = Professional(
+                id=user.id,
+                service_domain=service_domain,
+                experience=experience,
+                documents=document,
+                status='pending'
+            )
+            db.session.add(professional)
+            jobs.enqueue('validate_document', created_by=user.id, professional_id=user.id, path=documents.path_for(document))
+            db.session.commit()
+
+            flash("Professional account created successfully! Awaiting admin approval.", "success")
+            return redirect(url_for('auth.login'))
+
+        except Exception as e:
+            db.session.rollback()
+            # A file this signup added and no professional refers to would
+            # otherwise stay in the store for good.
+            if stored and not Professional.query.filter_by(documents=document).first():
+                documents.remove(document)
+            flash(f"An error occurred: {e}", "danger")
+            return redirect(request.url)
+
+    return render_template('professional_signup.html')
+
+@bp.route('/')
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'GET':
+        return render_template('login.html')
+
+    elif request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+
+        user = User.query.filter_by(email=email).first()
+
+        try:
+            valid = user.check_password(password) if user else passwords.verify(None, password)
+            if valid and passwords.needs_rehash(user.password):
+                user.password = passwords.hash_password(password)
+                db.session.commit()
+        except passwords.Busy as e:
+            flash(str(e), "error")
+            return redirect(url_for('auth.login'))
+
+        if not valid:
+            flash("Invalid email or password!", "error")
+            return redirect(url_for('auth.login'))
+
+        session['user_id'] = user.id 
+        session['role'] = user.role
+        session['name'] = user.name
+
+        if user.role == 'admin':
+            return redirect(url_for('admin.admin_dashboard'))
+        elif user.role == 'customer':
+            return redirect(url_for('customer.customer_dashboard'))
+        elif user.role == 'professional':
+            return redirect(url_for('professional.professional_dashboard'))
+        else:
+            flash("User role not recognized.", "error")
+            return redirect(url_for('auth.login'))
+    
+
+@bp.route('/logout')
+def logout():
+    session.pop('user_id', None)
+    session.pop('role', None)
+    return redirect(url_for('auth.login'))
@@ -0,0 +1,518 @@
+"""Benchmark harness for the Flask routes.
+
+    python benchmark.py seed --services 100000 --database sqlite:///bench.db
+    python benchmark.py run --database sqlite:///bench.db --concurrency 8 --output bench_output.txt
+    python benchmark.py startup --database sqlite:///bench.db --runs 10
+    python benchmark.py login --database sqlite:///bench.db --costs 50000,260000,600000
+
+`seed` fills the database with customers, professionals and services at the
+requested scale. `run` drives every route through the Flask test client and
+prints per-route latency percentiles, throughput, SQL statement counts and
+RSS growth as JSON, so two commits can be compared by diffing the output.
+`startup` times a cold import of the app and its first requests in fresh
+interpreters. `login` measures logins per second at each password hashing
+cost.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+CATEGORIES = ['Cleaning', 'Plumbing', 'Carpentry', 'Electrician', 'Laundry']
+STATUSES = [('created', 20), ('pending', 10), ('requested', 20), ('inprogress', 15), ('completed', 30), ('closed', 5)]
+PASSWORD = 'password'
+CHUNK = 10000
+# Smallest file the document check in jobs.validate_document accepts.
+BENCH_PDF = b'%PDF-1.4\n%bench\n%%EOF\n'
+
+
+def load_app(database):
+    # create_app() reads DATABASE_URL.
+    if database:
+        os.environ['DATABASE_URL'] = database
+    from main import create_app
+    from models import db
+    return create_app(), db
+
+
+def chunks(rows, size=CHUNK):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def seed(args):
+    app, db = load_app(args.database)
+    from sqlalchemy import insert, func
+    from models import User, Customer, Professional, Service
+    import rollups
+    import passwords
+
+    import bootstrap
+
+    rng = random.Random(args.seed)
+    pincodes = [f'{rng.randint(100, 999)}{rng.randint(0, 999):03d}' for _ in range(50)]
+
+    with app.app_context():
+        bootstrap.init()
+        admin_id = db.session.query(User.id).filter_by(role='admin').scalar()
+        next_id = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+        # One hash shared by every seeded account, hashing each would dominate
+        # the seed time.
+        password = passwords.hash_password(PASSWORD)
+
+        users, customers, professionals = [], [], []
+        for i in range(args.customers):
+            user_id = next_id + i
+            users.append(dict(id=user_id, name=f'Customer {user_id}', email=f'customer{user_id}@bench.test',
+                              password=password, role='customer', address=f'{user_id} Bench Street',
+                              pincode=rng.choice(pincodes), mobile='9000000000'))
+            customers.append(dict(id=user_id))
+        next_id += args.customers
+        for i in range(args.professionals):
+            user_id = next_id + i
+            users.append(dict(id=user_id, name=f'Professional {user_id}', email=f'pro{user_id}@bench.test',
+                              password=password, role='professional', address=f'{user_id} Bench Road',
+                              pincode=rng.choice(pincodes), mobile='9100000000'))
+            professionals.append(dict(id=user_id, service_domain=CATEGORIES[i % len(CATEGORIES)],
+                                      experience=rng.randint(0, 20), documents=None,
+                                      status=rng.choice(['approved', 'approved', 'approved', 'pending'])))
+
+        for model, rows in ((User, users), (Customer, customers), (Professional, professionals)):
+            for chunk in chunks(rows):
+                db.session.execute(insert(model), chunk)
+            db.session.commit()
+
+        customer_ids = [row['id'] for row in customers]
+        professionals_by_domain = {}
+        for row in professionals:
+            professionals_by_domain.setdefault(row['service_domain'], []).append(row['id'])
+
+        statuses, weights = zip(*STATUSES)
+        start = datetime.now() - timedelta(days=365)
+        services = []
+        for i in range(args.services):
+            name = rng.choice(CATEGORIES)
+            status = rng.choices(statuses, weights)[0]
+            assigned = status in ('inprogress', 'completed', 'closed') and professionals_by_domain.get(name)
+            services.append(dict(
+                name=name,
+                price=round(rng.uniform(100, 5000), 2),
+                description=f'{name} job {i}',
+                address=f'{rng.randint(1, 999)} {rng.choice(["MG Road", "Park Street", "Lake View"])}',
+                created_by=admin_id,
+                status=status,
+                date_created=(start + timedelta(minutes=rng.randint(0, 525600))).strftime('%Y-%m-%d %H:%M:%S'),
+                customer_id=None if status == 'created' or not customer_ids else rng.choice(customer_ids),
+                professional_id=rng.choice(assigned) if assigned else None,
+                rating=rng.randint(1, 5) if status == 'completed' else None,
+                remarks=None,
+            ))
+            if len(services) == CHUNK:
+                db.session.execute(insert(Service), services)
+                db.session.commit()
+                services = []
+        if services:
+            db.session.execute(insert(Service), services)
+            db.session.commit()
+
+        # Core inserts skip the ORM flush hook that maintains the rollups.
+        rollups.rebuild()
+
+    print(json.dumps({'customers': args.customers, 'professionals': args.professionals, 'services': args.services}))
+
+
+class StatementCounter:
+    def __init__(self):
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        route = getattr(self.local, 'route', None)
+        if route is not None:
+            with self.lock:
+                self.counts[route] = self.counts.get(route, 0) + 1
+
+
+def scenarios(app, db):
+    from models import User, Customer, Professional, Service
+    import transitions
+
+    with app.app_context():
+        admin = User.query.filter_by(role='admin').first()
+        customer = User.query.filter_by(role='customer').first()
+        professional = User.query.filter_by(role='professional').first()
+        if not customer or not professional:
+            sys.exit("Seed the database first: python benchmark.py seed")
+        emails = {'admin': admin.email, 'customer': customer.email, 'professional': professional.email}
+        open_ids = [row[0] for row in db.session.query(Service.id).filter_by(customer_id=None).limit(5000)]
+        requested_ids = [row[0] for row in db.session.query(Service.id).filter_by(status='requested').limit(5000)]
+        pending_ids = [row[0] for row in db.session.query(Service.id).filter_by(status='pending').limit(5000)]
+        own_open_ids = [row[0] for row in db.session.query(Service.id).filter(
+            Service.customer_id == customer.id, Service.status.in_(transitions.OPEN_STATUSES)).limit(5000)]
+        pending_professional_ids = [row[0] for row in db.session.query(Professional.id).filter_by(status='pending').limit(5000)]
+        # Every approved professional but the one the professional routes
+        # log in as.
+        approved_professional_ids = [row[0] for row in db.session.query(Professional.id).filter(
+            Professional.status == 'approved', Professional.id != professional.id).limit(5000)]
+        own_ids = [row[0] for row in db.session.query(Service.id).filter_by(customer_id=customer.id).limit(5000)]
+        # Every customer but the one the customer routes log in as.
+        other_customer_ids = [row[0] for row in db.session.query(Customer.id).filter(Customer.id != customer.id).limit(5000)]
+        any_id = db.session.query(Service.id).first()[0]
+
+    def pick(ids):
+        return lambda rng: rng.choice(ids) if ids else any_id
+
+    open_service, requested_service = pick(open_ids), pick(requested_ids)
+    pending_service, own_open_service = pick(pending_ids), pick(own_open_ids)
+    pending_professional, other_customer = pick(pending_professional_ids), pick(other_customer_ids)
+    approved_professional, own_service = pick(approved_professional_ids), pick(own_ids)
+
+    def customer_form(rng):
+        return {
+            'name': 'Bench Customer', 'email': f'customer-{uuid.uuid4().hex}@bench.test', 'password': PASSWORD,
+            'mobile': '9300000000', 'address': 'Bench Lane', 'pincode': '560001',
+        }
+
+    def signup_form(rng):
+        return {
+            'name': 'Bench Signup', 'email': f'signup-{uuid.uuid4().hex}@bench.test', 'password': PASSWORD,
+            'mobile': '9200000000', 'service_domain': rng.choice(CATEGORIES), 'experience': '3',
+            'address': 'Bench Lane', 'pincode': '560001', 'documents': (io.BytesIO(BENCH_PDF), 'bench.pdf'),
+        }
+
+    # name -> (role, method, path(rng), form(rng))
+    return {
+        'register': (None, 'GET', lambda rng: '/register', None),
+        'login_page': (None, 'GET', lambda rng: '/login', None),
+        'login': (None, 'POST', lambda rng: '/login', lambda rng: {'email': emails['customer'], 'password': PASSWORD}),
+        'logout': ('customer', 'GET', lambda rng: '/logout', None),
+        'customer_signup_page': (None, 'GET', lambda rng: '/customer_signup', None),
+        'customer_signup': (None, 'POST', lambda rng: '/customer_signup', customer_form),
+        'professional_signup_page': (None, 'GET', lambda rng: '/professional_signup', None),
+        'professional_signup': (None, 'POST', lambda rng: '/professional_signup', signup_form),
+        'customer_dashboard': ('customer', 'GET', lambda rng: '/customer_dashboard', None),
+        'get_services': ('customer', 'GET', lambda rng: f'/get_services?category={rng.choice(CATEGORIES)}', None),
+        'customer_search': ('customer', 'GET', lambda rng: f'/customer_search?service_type={rng.choice(CATEGORIES)}&status=current', None),
+        'customer_summary': ('customer', 'GET', lambda rng: '/customer_summary', None),
+        'service_request_page': ('customer', 'GET', lambda rng: '/service_request', None),
+        'service_request': ('customer', 'POST', lambda rng: '/service_request',
+                            lambda rng: {'service_type': rng.choice(CATEGORIES), 'description': 'bench', 'address': 'Bench Street'}),
+        'book_service': ('customer', 'POST', lambda rng: '/book_service', lambda rng: {'service_id': open_service(rng)}),
+        'service_history': ('customer', 'GET', lambda rng: f'/service_history/{any_id}', None),
+        'service_details': ('customer', 'GET', lambda rng: f'/service_details/{own_service(rng)}', None),
+        'close_service_details': ('customer', 'POST', lambda rng: f'/service_details/{own_open_service(rng)}', None),
+        'close_service_page': ('customer', 'GET', lambda rng: f'/close_service/{any_id}', None),
+        'close_service': ('customer', 'POST', lambda rng: f'/close_service/{own_open_service(rng)}',
+                          lambda rng: {'rating': rng.randint(1, 5), 'remarks': 'bench'}),
+        'professional_dashboard': ('professional', 'GET', lambda rng: '/professional_dashboard', None),
+        'professional_search': ('professional', 'GET', lambda rng: '/professional_search?search_by=location&search_input=Road', None),
+        'professional_summary': ('professional', 'GET', lambda rng: '/professional_summary', None),
+        'view_service': ('professional', 'GET', lambda rng: f'/view_service/{requested_service(rng)}', None),
+        'accept_service': ('professional', 'POST', lambda rng: f'/accept_service/{requested_service(rng)}', None),
+        'admin_dashboard': ('admin', 'GET', lambda rng: '/admin_dashboard', None),
+        'admin_review_request': ('admin', 'POST', lambda rng: '/admin_dashboard',
+                                 lambda rng: {'service_request_id': pending_service(rng),
+                                              'action': rng.choice(['accept', 'reject'])}),
+        'admin_search': ('admin', 'GET', lambda rng: f'/admin_search?search_input={rng.choice(CATEGORIES)}', None),
+        'admin_service_view': ('admin', 'GET', lambda rng: f'/admin_service_view/{any_id}', None),
+        'admin_summary': ('admin', 'GET', lambda rng: '/admin_summary', None),
+        'manage_services': ('admin', 'GET', lambda rng: '/manage_services', None),
+        'manage_requests': ('admin', 'GET', lambda rng: '/manage_requests', None),
+        'review_request': ('admin', 'POST', lambda rng: '/manage_requests',
+                           lambda rng: {'service_id': pending_service(rng), 'action': rng.choice(['approve', 'reject']),
+                                        'price': '499'}),
+        'end_service': ('admin', 'POST', lambda rng: f'/end_service/{requested_service(rng)}', None),
+        'approve_professional': ('admin', 'GET',
+                                 lambda rng: f'/approve_professional/{pending_professional(rng)}/accept', None),
+        'delete_customer': ('admin', 'POST', lambda rng: f'/delete_customer/{other_customer(rng)}', None),
+        'delete_professional': ('admin', 'GET', lambda rng: f'/delete_professional/{approved_professional(rng)}', None),
+        'manage_professionals': ('admin', 'GET', lambda rng: '/manage_professionals', None),
+        'manage_customers': ('admin', 'GET', lambda rng: '/manage_customers', None),
+        'new_service_page': ('admin', 'GET', lambda rng: '/new_service', None),
+        'new_service': ('admin', 'POST', lambda rng: '/new_service',
+                        lambda rng: {'service_name': rng.choice(CATEGORIES), 'description': 'bench',
+                                     'base_price': '499', 'address': 'Bench Street'}),
+    }, emails
+
+
+def current_rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(args):
+    app, db = load_app(args.database)
+    from sqlalchemy import event
+
+    routes, emails = scenarios(app, db)
+    selected = args.routes.split(',') if args.routes else list(routes)
+    unknown = set(selected) - set(routes)
+    if unknown:
+        sys.exit(f"Unknown routes: {', '.join(sorted(unknown))}")
+
+    counter = StatementCounter()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', counter)
+
+    clients = threading.local()
+
+    def client_for(role):
+        cache = getattr(clients, 'by_role', None)
+        if cache is None:
+            cache = clients.by_role = {}
+        if role not in cache:
+            client = app.test_client()
+            if role:
+                client.post('/login', data={'email': emails[role], 'password': PASSWORD})
+            cache[role] = client
+        return cache[role]
+
+    def one_request(name, seed):
+        role, method, path, form = routes[name]
+        rng = random.Random(seed)
+        client = client_for(role)
+        counter.local.route = name
+        started = time.perf_counter()
+        response = client.open(path(rng), method=method, data=form(rng) if form else None)
+        elapsed = time.perf_counter() - started
+        counter.local.route = None
+        if name == 'logout':
+            # The next request logs in again before its timer starts.
+            del clients.by_role[role]
+        return elapsed, response.status_code
+
+    results = {}
+    for name in selected:
+        counter.counts[name] = 0
+        rss_before = current_rss_kb()
+        peak_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            # Warm each worker's session before timing.
+            list(pool.map(lambda seed: client_for(routes[name][0]), range(args.concurrency)))
+            counter.counts[name] = 0
+            started = time.perf_counter()
+            samples = list(pool.map(lambda seed: one_request(name, seed), range(args.requests)))
+            wall = time.perf_counter() - started
+
+        latencies = [elapsed * 1000 for elapsed, _ in samples]
+        errors = sum(1 for _, status in samples if status >= 500)
+        results[name] = {
+            'requests': len(samples),
+            'errors': errors,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'requests_per_sec': len(samples) / wall if wall else None,
+            'sql_statements_per_request': counter.counts[name] / len(samples) if samples else None,
+            # ru_maxrss only ever grows within the process, so each route
+            # reports how far it raised the peak and what it left resident.
+            'peak_rss_growth_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak_before,
+            'rss_delta_kb': current_rss_kb() - rss_before,
+        }
+        print(f"{name}: p50 {results[name]['p50_ms']:.1f} ms, {results[name]['requests_per_sec']:.0f} req/s", file=sys.stderr)
+
+    report = {
+        'database': app.config['SQLALCHEMY_DATABASE_URI'],
+        'concurrency': args.concurrency,
+        'requests_per_route': args.requests,
+        'routes': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from wsgi import app
+imported = time.perf_counter()
+client = app.test_client()
+timings = []
+for path in sys.argv[1:]:
+    before = time.perf_counter()
+    status = client.get(path).status_code
+    timings.append((path, status, time.perf_counter() - before))
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'requests': [[path, status, elapsed * 1000] for path, status, elapsed in timings],
+    'modules': len(sys.modules),
+    'plotting_loaded': 'matplotlib' in sys.modules,
+}))
+"""
+
+
+def startup(args):
+    # Every run is a fresh interpreter, so imports are cold apart from the
+    # OS file cache.
+    app, db = load_app(args.database)
+    import bootstrap
+    with app.app_context():
+        bootstrap.init()
+
+    paths = args.paths.split(',')
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, '-c', STARTUP_PROBE, *paths],
+            cwd=here, env=os.environ.copy(), capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = {
+        'database': app.config['SQLALCHEMY_DATABASE_URI'],
+        'runs': args.runs,
+        'import_ms': {
+            'median': statistics.median(sample['import_ms'] for sample in samples),
+            'min': min(sample['import_ms'] for sample in samples),
+        },
+        'requests': {},
+        'modules': samples[-1]['modules'],
+        'plotting_loaded': samples[-1]['plotting_loaded'],
+    }
+    for index, path in enumerate(paths):
+        latencies = [sample['requests'][index][2] for sample in samples]
+        report['requests'][f'{index + 1}: {path}'] = {
+            'status': samples[-1]['requests'][index][1],
+            'median_ms': statistics.median(latencies),
+            'min_ms': min(latencies),
+        }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+def login(args):
+    # The bench account is rehashed at each cost before it is timed, so
+    # every timed login is a plain verify and never a rehash.
+    app, db = load_app(args.database)
+    from models import User
+    import passwords
+
+    with app.app_context():
+        user = User.query.filter_by(role='customer').first()
+        if not user:
+            sys.exit("Seed the database first: python benchmark.py seed")
+        email, original = user.email, user.password
+
+    def one_login(seed):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post('/login', data={'email': email, 'password': PASSWORD})
+        return time.perf_counter() - started, response.status_code, response.location or ''
+
+    results = {}
+    try:
+        for cost in [int(cost) for cost in args.costs.split(',')]:
+            app.config['PASSWORD_HASH_COST'] = cost
+            with app.app_context():
+                User.query.filter_by(email=email).one().password = passwords.hash_password(PASSWORD)
+                db.session.commit()
+
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                started = time.perf_counter()
+                samples = list(pool.map(one_login, range(args.logins)))
+                wall = time.perf_counter() - started
+
+            latencies = [elapsed * 1000 for elapsed, _, _ in samples]
+            # Logins turned away by the hashing queue land back on /login.
+            rejected = sum(1 for _, status, location in samples if status != 302 or location.endswith('/login'))
+            results[str(cost)] = {
+                'logins': len(samples),
+                'rejected': rejected,
+                'logins_per_sec': (len(samples) - rejected) / wall if wall else None,
+                'p50_ms': percentile(latencies, 0.50),
+                'p95_ms': percentile(latencies, 0.95),
+                'p99_ms': percentile(latencies, 0.99),
+            }
+            print(f"cost {cost}: {results[str(cost)]['logins_per_sec']:.1f} logins/s, p50 {results[str(cost)]['p50_ms']:.1f} ms", file=sys.stderr)
+    finally:
+        with app.app_context():
+            User.query.filter_by(email=email).one().password = original
+            db.session.commit()
+
+    report = {
+        'database': app.config['SQLALCHEMY_DATABASE_URI'],
+        'algorithm': app.config['PASSWORD_HASH_ALGORITHM'],
+        'hash_workers': app.config['PASSWORD_HASH_WORKERS'],
+        'hash_queue': app.config['PASSWORD_HASH_QUEUE'],
+        'concurrency': args.concurrency,
+        'costs': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = subcommands.add_parser('seed', help='fill the database with synthetic data')
+    seed_parser.add_argument('--database', help='SQLAlchemy URL, defaults to DATABASE_URL')
+    seed_parser.add_argument('--services', type=int, default=10000)
+    seed_parser.add_argument('--customers', type=int, default=1000)
+    seed_parser.add_argument('--professionals', type=int, default=200)
+    seed_parser.add_argument('--seed', type=int, default=42)
+    seed_parser.set_defaults(handler=seed)
+
+    run_parser = subcommands.add_parser('run', help='benchmark the routes')
+    run_parser.add_argument('--database', help='SQLAlchemy URL, defaults to DATABASE_URL')
+    run_parser.add_argument('--routes', help='comma-separated route names, defaults to all')
+    run_parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    run_parser.add_argument('--concurrency', type=int, default=4)
+    run_parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    run_parser.set_defaults(handler=run)
+
+    startup_parser = subcommands.add_parser('startup', help='time cold imports and first requests')
+    startup_parser.add_argument('--database', help='SQLAlchemy URL, defaults to DATABASE_URL')
+    startup_parser.add_argument('--runs', type=int, default=5)
+    startup_parser.add_argument('--paths', default='/login,/login',
+                                help='comma-separated paths requested in order after the import')
+    startup_parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    startup_parser.set_defaults(handler=startup)
+
+    login_parser = subcommands.add_parser('login', help='measure login throughput per hashing cost')
+    login_parser.add_argument('--database', help='SQLAlchemy URL, defaults to DATABASE_URL')
+    login_parser.add_argument('--costs', default='50000,150000,260000,600000',
+                              help='comma-separated PASSWORD_HASH_COST values to compare')
+    login_parser.add_argument('--logins', type=int, default=200, help='logins per cost')
+    login_parser.add_argument('--concurrency', type=int, default=16)
+    login_parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    login_parser.set_defaults(handler=login)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
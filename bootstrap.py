@@ -0,0 +1,21 @@
+import click
+from flask.cli import with_appcontext
+from models import init_db
+import rollups
+import search
+
+
+def init():
+    # Schema creation, the admin account and derived tables. Run once per
+    # deployment with `flask init-db` rather than on every worker start.
+    init_db()
+    rollups.backfill()
+    if search.enabled():
+        search.create_index()
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    init()
+    click.echo("Database initialised.")
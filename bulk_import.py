@@ -0,0 +1,257 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+from models import db, User, Customer, Professional, Service
+import rollups
+import catalog
+import fragments
+import passwords
+
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+KINDS = ('services', 'customers', 'professionals')
+SERVICE_STATUSES = {'created', 'pending', 'requested', 'inprogress', 'completed', 'closed'}
+PROFESSIONAL_STATUSES = {'pending', 'approved', 'rejected', 'blocked'}
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def read_rows(stream, fmt):
+    # Yields (line number, dict) one record at a time, so the file is never
+    # held in memory as a whole.
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    yield line_number, RowError(f"invalid JSON: {e}")
+
+
+def _text(row, column, required=True):
+    value = row.get(column.key)
+    value = value.strip() if isinstance(value, str) else value
+    if value in (None, ''):
+        if required and not column.nullable:
+            raise RowError(f"{column.key} is required")
+        return None
+    value = str(value)
+    length = getattr(column.type, 'length', None)
+    if length and len(value) > length:
+        raise RowError(f"{column.key} is longer than {length} characters")
+    return value
+
+
+def _number(row, column, kind):
+    value = row.get(column.key)
+    if value in (None, ''):
+        if not column.nullable:
+            raise RowError(f"{column.key} is required")
+        return None
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{column.key} must be a {kind.__name__}")
+
+
+def service_row(row, created_by):
+    columns = Service.__table__.c
+    status = _text(row, columns.status, required=False) or 'created'
+    if status not in SERVICE_STATUSES:
+        raise RowError(f"unknown status {status!r}")
+    rating = _number(row, columns.rating, int)
+    if rating is not None and not 1 <= rating <= 5:
+        raise RowError("rating must be between 1 and 5")
+    return {
+        'name': _text(row, columns.name),
+        'price': _number(row, columns.price, float),
+        'description': _text(row, columns.description),
+        'address': _text(row, columns.address),
+        'status': status,
+        'date_created': _text(row, columns.date_created, required=False) or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'created_by': _number(row, columns.created_by, int) if row.get('created_by') else created_by,
+        'customer_id': _number(row, columns.customer_id, int),
+        'professional_id': _number(row, columns.professional_id, int),
+        'rating': rating,
+        'remarks': _text(row, columns.remarks),
+    }
+
+
+def user_row(row, role):
+    columns = User.__table__.c
+    return {
+        'name': _text(row, columns.name),
+        'email': _text(row, columns.email),
+        'password': _text(row, columns.password),
+        'role': role,
+        'address': _text(row, columns.address),
+        'pincode': _text(row, columns.pincode),
+        'mobile': _text(row, columns.mobile),
+    }
+
+
+def professional_row(row):
+    columns = Professional.__table__.c
+    status = _text(row, columns.status, required=False) or 'pending'
+    if status not in PROFESSIONAL_STATUSES:
+        raise RowError(f"unknown status {status!r}")
+    return {
+        'service_domain': _text(row, columns.service_domain),
+        'experience': _number(row, columns.experience, int),
+        'documents': _text(row, columns.documents),
+        'status': status,
+    }
+
+
+def _insert_services(rows):
+    db.session.execute(insert(Service), rows)
+    # Core inserts skip the ORM flush hook that maintains the rollups.
+    rollups.record_inserts(
+        db.session.connection(),
+        [rollups.state_of(row['name'], row['professional_id'], row['status'], row['rating']) for row in rows]
+    )
+    catalog.mark_stale(db.session, [row['name'] for row in rows if row['customer_id'] is None])
+    fragments.mark_changed(db.session, ['service'])
+
+
+def _insert_users(rows, kind):
+    users = [user for user, _ in rows]
+    # Hashes exported from another install are kept as they are.
+    plain = [user for user in users if not passwords.is_hashed(user['password'])]
+    for user, hashed in zip(plain, passwords.hash_many([user['password'] for user in plain])):
+        user['password'] = hashed
+    ids = db.session.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True), users
+    ).scalars().all()
+    if kind == 'customers':
+        db.session.execute(insert(Customer), [{'id': user_id} for user_id in ids])
+    else:
+        db.session.execute(insert(Professional), [dict(extra, id=user_id) for user_id, (_, extra) in zip(ids, rows)])
+    # Core inserts skip the flush hook that bumps the fragment versions.
+    fragments.mark_changed(db.session, ['user', 'customer' if kind == 'customers' else 'professional'])
+
+
+# SQLite does not enforce the foreign keys, so ids pointing at no one
+# would be stored and then drop out of every joined query.
+REFERENCES = (
+    ('customer_id', Customer),
+    ('professional_id', Professional),
+    ('created_by', User),
+)
+
+
+def _check_references(chunk, report):
+    # One query per referenced table and chunk, like the email check below.
+    existing = {}
+    for column, model in REFERENCES:
+        ids = {row[column] for _, row in chunk if row[column] is not None}
+        existing[column] = set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars()) if ids else set()
+
+    valid = []
+    for line, row in chunk:
+        missing = [f"{column} {row[column]}" for column, _ in REFERENCES
+                   if row[column] is not None and row[column] not in existing[column]]
+        if missing:
+            report.error(line, f"unknown {', '.join(missing)}")
+        else:
+            valid.append((line, row))
+    return valid
+
+
+def _flush_chunk(kind, chunk, report):
+    if not chunk:
+        return
+    if kind == 'services':
+        chunk = _check_references(chunk, report)
+        if chunk:
+            _insert_services([row for _, row in chunk])
+    else:
+        # Reject emails that already exist in one query per chunk instead of
+        # letting the unique constraint abort the whole batch.
+        emails = [row[0]['email'] for _, row in chunk]
+        taken = set(db.session.execute(select(User.email).where(User.email.in_(emails))).scalars())
+        fresh = []
+        for line, row in chunk:
+            if row[0]['email'] in taken:
+                report.error(line, f"email {row[0]['email']} is already registered")
+            else:
+                taken.add(row[0]['email'])
+                fresh.append(row)
+        chunk = fresh
+        if chunk:
+            _insert_users(chunk, kind)
+    db.session.commit()
+    report.inserted += len(chunk)
+
+
+def run_import(kind, stream, fmt='csv', chunk_size=CHUNK_SIZE, created_by=None):
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+    if created_by is None:
+        created_by = db.session.execute(select(User.id).where(User.role == 'admin')).scalars().first()
+
+    report = ImportReport()
+    chunk = []
+    for line, row in read_rows(stream, fmt):
+        try:
+            if isinstance(row, Exception):
+                raise row
+            if not isinstance(row, dict):
+                raise RowError("each record must be an object")
+            if kind == 'services':
+                chunk.append((line, service_row(row, created_by)))
+            elif kind == 'customers':
+                chunk.append((line, (user_row(row, 'customer'), None)))
+            else:
+                chunk.append((line, (user_row(row, 'professional'), professional_row(row))))
+        except RowError as e:
+            report.error(line, str(e))
+            continue
+
+        if len(chunk) >= chunk_size:
+            _flush_chunk(kind, chunk, report)
+            chunk = []
+    _flush_chunk(kind, chunk, report)
+    return report
+
+
+@click.command('import-data')
+@click.argument('kind', type=click.Choice(KINDS))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+              help='Defaults to the file extension.')
+@click.option('--chunk-size', type=int, default=CHUNK_SIZE)
+@click.option('--created-by', type=int, default=None, help='User id recorded on imported services.')
+@with_appcontext
+def import_data_command(kind, path, fmt, chunk_size, created_by):
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as stream:
+        report = run_import(kind, stream, fmt, chunk_size, created_by)
+    for line, message in report.errors:
+        click.echo(f"line {line}: {message}", err=True)
+    click.echo(f"{report.inserted} rows imported, {report.failed} rejected.")
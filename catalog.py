@@ -0,0 +1,150 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from models import db, Service
+import transitions
+
+ALL = '*'
+
+# A detached copy of an open catalog entry (a service no customer has booked
+# yet), picklable so the filesystem backend can share it between processes.
+Entry = namedtuple('Entry', 'id name price description address status date_created customer_id')
+
+
+class LocalBackend:
+    # Per process. Invalidation reaches only this worker; other workers see a
+    # change once their copy expires.
+    def __init__(self, app):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class FileBackend:
+    # One pickle per key under CATALOG_CACHE_DIR, shared by every worker on
+    # the host, so an invalidation in one process is seen by all of them.
+    def __init__(self, app):
+        self.folder = app.config['CATALOG_CACHE_DIR']
+
+    def path_for(self, key):
+        return os.path.join(self.folder, hashlib.sha1(key.encode('utf8')).hexdigest() + '.pickle')
+
+    def get(self, key):
+        try:
+            with open(self.path_for(key), 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value if expires > time.time() else None
+
+    def set(self, key, value, ttl):
+        # Written to a temporary file and renamed, so readers never see a
+        # partial pickle.
+        os.makedirs(self.folder, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                pickle.dump((time.time() + ttl, value), out, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path_for(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def delete(self, key):
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+
+BACKENDS = {
+    'memory': LocalBackend,
+    'filesystem': FileBackend,
+}
+
+
+def load(category):
+    columns = [getattr(Service, field) for field in Entry._fields]
+    stmt = select(*columns).where(Service.customer_id == None).order_by(Service.id.desc())
+    if category != ALL:
+        stmt = stmt.where(Service.name == category)
+    return [Entry(*row) for row in db.session.execute(stmt)]
+
+
+def entries(category=None):
+    # Open entries of one category (or of all of them), newest first.
+    key = category or ALL
+    backend = current_app.extensions.get('catalog')
+    if backend is None:
+        return load(key)
+    found = backend.get(key)
+    if found is None:
+        found = load(key)
+        # Empty results are not kept, so made-up categories in the query
+        # string cannot fill the cache.
+        if found:
+            backend.set(key, found, current_app.config['CATALOG_CACHE_TTL'])
+    return found
+
+
+def invalidate(*categories):
+    backend = current_app.extensions.get('catalog')
+    if backend is None:
+        return
+    for category in set(categories) | {ALL}:
+        backend.delete(category)
+
+
+def mark_stale(session, categories):
+    session.info.setdefault('catalog_stale', set()).update(categories)
+
+
+# Catalog entries are the services still in the created state, so only
+# changes into or out of it touch the cache.
+def service_changed(session, service_id, old, new):
+    if old and old[2] == 'created':
+        mark_stale(session, [old[0]])
+    if new and new[2] == 'created':
+        mark_stale(session, [new[0]])
+
+
+transitions.service_listeners.append(service_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_committed(session):
+    categories = session.info.pop('catalog_stale', None)
+    if categories:
+        invalidate(*categories)
+
+
+@event.listens_for(Session, 'after_rollback')
+def drop_stale(session):
+    session.info.pop('catalog_stale', None)
+
+
+def init_app(app):
+    app.extensions['catalog'] = BACKENDS[app.config['CATALOG_CACHE']](app)
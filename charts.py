@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import hmac
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+
+MAX_CHARTS = 256
+# Specs come back from the browser. The key already proves the server made
+# them, the limits keep a leaked or buggy spec from costing seconds of CPU.
+MAX_SPEC_LENGTH = 8192
+MAX_POINTS = 100
+
+# Called with (kind, seconds) after every render, see metrics.py.
+render_listeners = []
+
+_cache = OrderedDict()
+_rendering = {}
+_lock = threading.Lock()
+
+
+def encode_spec(kind, data):
+    raw = json.dumps([kind, data], separators=(',', ':')).encode('utf8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def chart_key(spec, secret):
+    # Keyed with the app secret, so clients cannot mint keys for specs of
+    # their own.
+    return hmac.new(secret.encode('utf8'), spec.encode('ascii'), hashlib.sha256).hexdigest()
+
+
+def decode_spec(spec):
+    kind, data = json.loads(base64.urlsafe_b64decode(spec.encode('ascii')))
+    return kind, data
+
+
+def status_bar(fig, data):
+    ax = fig.subplots()
+    ax.bar([label for label, _ in data], [value for _, value in data])
+    ax.set_xlabel('Service Status')
+    ax.set_ylabel('Number of Services')
+    ax.set_title('Services Status Overview')
+
+
+def rating_bar(fig, data):
+    ax = fig.subplots()
+    ax.bar(['Average Rating'], [data['avg_rating']], color='skyblue')
+    ax.set_title(data['title'])
+    ax.set_ylabel('Average Rating')
+    ax.set_ylim(0, 5)
+
+
+def status_pie(fig, data):
+    ax = fig.subplots()
+    ax.pie([value for _, value in data], labels=[label for label, _ in data], autopct='%1.1f%%', startangle=90, colors=['#ff9999','#66b3ff','#99ff99'])
+    ax.set_title('Service Status (Jobs Completed vs. Jobs In Progress)')
+
+
+def type_bar(fig, data):
+    import seaborn as sns
+    ax = fig.subplots()
+    sns.barplot(x=[label for label, _ in data], y=[value for _, value in data], ax=ax, palette='viridis')
+    ax.set_title('Services Requested by Type')
+    ax.set_xlabel('Service Type')
+    ax.set_ylabel('Number of Requests')
+
+
+RENDERERS = {
+    'status_bar': status_bar,
+    'rating_bar': rating_bar,
+    'status_pie': status_pie,
+    'type_bar': type_bar,
+}
+
+
+def render(kind, data):
+    # Figure objects are not tracked by pyplot's global figure manager, so
+    # they are released as soon as the PNG bytes are taken. matplotlib and
+    # seaborn are imported on the first render rather than at startup.
+    from matplotlib.figure import Figure
+    started = time.perf_counter()
+    fig = Figure()
+    try:
+        RENDERERS[kind](fig, data)
+        img = io.BytesIO()
+        fig.savefig(img, format='png')
+        return img.getvalue()
+    finally:
+        fig.clear()
+        for listener in render_listeners:
+            listener(kind, time.perf_counter() - started)
+
+
+def cached(key):
+    with _lock:
+        return key in _cache
+
+
+def get_png(key, spec, secret):
+    with _lock:
+        png = _cache.get(key)
+        if png is not None:
+            _cache.move_to_end(key)
+            return png
+        # A chart pre-rendered by a background job is usually still being
+        # drawn when the browser asks for it; wait for that render instead of
+        # starting a second one.
+        pending = _rendering.get(key)
+    if pending is not None:
+        pending.wait()
+        with _lock:
+            png = _cache.get(key)
+        if png is not None:
+            return png
+
+    if not spec or len(spec) > MAX_SPEC_LENGTH or not hmac.compare_digest(chart_key(spec, secret), key):
+        return None
+    try:
+        kind, data = decode_spec(spec)
+    except ValueError:
+        return None
+    if kind not in RENDERERS or (isinstance(data, list) and len(data) > MAX_POINTS):
+        return None
+
+    with _lock:
+        done = _rendering.setdefault(key, threading.Event())
+    try:
+        png = render(kind, data)
+        with _lock:
+            _cache[key] = png
+            _cache.move_to_end(key)
+            while len(_cache) > MAX_CHARTS:
+                _cache.popitem(last=False)
+    finally:
+        with _lock:
+            _rendering.pop(key, None)
+        done.set()
+    return png
@@ -0,0 +1,215 @@
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from models import db, Service
+import pagination
+import catalog
+import search
+import identity
+import stats
+import transitions
+from routes import login_required, chart_url
+from datetime import datetime
+
+bp = Blueprint('customer', __name__)
+
+@bp.route('/customer_dashboard')
+def customer_dashboard():
+    username = session.get('name')
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            flash('Please log in to access the dashboard.', 'error')
+            return redirect(url_for('auth.login'))
+
+        service_history = pagination.paginate(db.session.query(Service).filter(Service.customer_id == user_id), Service.id)
+        return render_template('customer_dashboard.html', service_history=service_history, username = username)
+    except Exception as e:
+        flash(f'Error loading dashboard: {e}', 'error')
+        return render_template('customer_dashboard.html', service_history=[])
+
+@bp.route('/customer_search', methods=['GET'])
+def customer_search():
+    service_type = request.args.get('service_type', '')
+    status = request.args.get('status', '')
+    terms = request.args.get('q', '')
+    customer = identity.current_user()
+
+    if not customer or customer.role != 'customer':
+        return render_template(
+            'customer_search.html',
+            services=[],
+            selected_type=service_type,
+            selected_status=status,
+            terms=terms
+        )
+
+    query = Service.query
+
+    if service_type:
+        query = query.filter(Service.name == service_type)
+
+    if status == 'current':
+        query = query.filter(Service.customer_id == None)
+
+    elif status == 'past':
+        query = query.filter(Service.customer_id == customer.id)
+
+    if terms:
+        services = search.ranked(query, terms, ['name', 'description', 'address'])
+    elif status == 'current':
+        services = pagination.paginate_items(catalog.entries(service_type or None), key=lambda entry: entry.id)
+    else:
+        services = pagination.paginate(query, Service.id)
+
+    return render_template(
+        'customer_search.html',
+        services=services,
+        selected_type=service_type,
+        selected_status=status,
+        terms=terms
+    )
+
+@bp.route('/customer_summary')
+def customer_summary():
+    customer_id = session.get('user_id')
+    
+    if not customer_id:
+        flash("You must be logged in to view your summary.", "danger")
+        return redirect(url_for('auth.login'))
+    
+    counts = stats.service_stats(customer_id=customer_id)['counts']
+    requested_count = counts['requested']
+    inprogress_count = counts['inprogress']
+    completed_count = counts['completed']
+
+    services_status_data = [
+        ['Requested', requested_count],
+        ['In-Progress', inprogress_count],
+        ['Completed', completed_count]
+    ]
+    services_status_plot = chart_url('status_bar', services_status_data)
+
+    return render_template('customer_summary.html', 
+                           requested_count=requested_count,
+                           inprogress_count=inprogress_count,
+                           completed_count=completed_count,
+                           services_status_plot=services_status_plot)
+
+@bp.route('/get_services', methods=['GET'])
+def get_services():
+    category = request.args.get('category')
+    if not category:
+        flash("Invalid category", "danger")
+        return redirect(url_for('customer.customer_dashboard'))
+
+    services = pagination.paginate_items(catalog.entries(category), key=lambda entry: entry.id, prefix='services_')
+    service_history = pagination.paginate(Service.query.filter_by(customer_id=session.get('user_id')), Service.id)
+    return render_template(
+        'customer_dashboard.html',
+        services=services,
+        category=category,
+        service_history=service_history
+    )
+
+@bp.route('/book_service', methods=['POST'])
+def book_service():
+    service_id = request.form.get('service_id', type=int)
+    customer_id = session.get('user_id')
+
+    if not service_id or not customer_id:
+        flash("Invalid service or customer ID", "danger")
+        return redirect(url_for('customer.customer_dashboard'))
+
+    if not transitions.book(service_id, customer_id):
+        db.session.rollback()
+        if db.session.get(Service, service_id) is None:
+            flash("Service not found", "danger")
+        else:
+            flash("Service already booked", "danger")
+        return redirect(url_for('customer.customer_dashboard'))
+
+    db.session.commit()
+
+    flash("Service booked successfully!", "success")
+    return redirect(url_for('customer.customer_dashboard'))
+
+@bp.route('/close_service/<int:service_id>', methods=['GET', 'POST'])
+@login_required
+def close_service(service_id):
+    service = Service.query.get_or_404(service_id)
+
+    if request.method == 'POST':
+        if transitions.complete(service.id, session.get('user_id'), request.form.get('rating', type=int), request.form['remarks']):
+            db.session.commit()
+            flash('Service has been closed and reviewed successfully.', 'success')
+        else:
+            db.session.rollback()
+            flash('This service can no longer be closed.', 'danger')
+        
+        return redirect(url_for('customer.customer_dashboard'))
+
+    return render_template('close_service.html', service=service)
+    
+
+@bp.route('/service_request', methods=['GET', 'POST'])
+def service_request():
+    user_id = session.get('user_id')
+    if not user_id:
+        flash("You need to log in to submit a service request.", "danger")
+        return redirect(url_for('auth.login'))
+
+    user = identity.current_user()
+    if not user or user.role != 'customer':
+        flash("Only customers can submit service requests.", "danger")
+        return redirect(url_for('auth.login'))
+
+    if request.method == 'GET':
+        return render_template('service_request.html')
+
+    elif request.method == 'POST':
+        service_name = request.form.get('service_type')
+        description = request.form.get('description')
+        address = request.form.get('address')
+        contact_number = request.form.get('contact_number')
+        new_service = Service(
+            name=service_name,
+            description=description,
+            address=address,
+            customer_id=user.id,
+            created_by=user_id,
+            status='pending',
+            date_created=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+
+        try:
+            db.session.add(new_service)
+            db.session.commit()
+            flash("Service request submitted successfully!", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"An error occurred: {str(e)}", "danger")
+
+        return redirect(url_for('customer.customer_dashboard'))
+    
+
+@bp.route('/service_history/<int:service_id>')
+@login_required
+def service_history(service_id):
+    service = Service.query.get_or_404(service_id)
+    return render_template('service_history.html', service=service)
+
+@bp.route('/service_details/<int:service_id>', methods=['GET', 'POST'])
+@login_required
+def service_details(service_id):
+    service = Service.query.get_or_404(service_id)
+    user_id = session.get('user_id')
+    if service.customer_id != user_id:
+        return redirect(url_for('customer.service_history'))
+
+    close_service = service.status in ['inprogress', 'requested', 'pending']
+
+    if request.method == 'POST' and close_service:
+        service.status = 'closed'
+        db.session.commit()
+        return redirect(url_for('customer.service_history'))
+
+    return render_template('service_details.html', service=service, close_service=close_service)
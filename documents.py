@@ -0,0 +1,76 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 64 * 1024
+DIGEST = re.compile(r'[0-9a-f]{64}')
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+def folder():
+    return current_app.config['DOCUMENT_FOLDER']
+
+
+def legacy_folder():
+    # Documents uploaded before the store existed are kept under their
+    # original file names here.
+    return os.path.join(current_app.root_path, 'static', 'uploads')
+
+
+def path_for(digest):
+    return os.path.join(folder(), digest[:2], digest + '.pdf')
+
+
+def resolve(name):
+    if DIGEST.fullmatch(name):
+        return path_for(name)
+    return os.path.join(legacy_folder(), secure_filename(name))
+
+
+def store(stream, max_bytes=None):
+    # Copies the upload in fixed-size chunks while hashing it, so memory use
+    # does not depend on the document size. Identical files share one copy;
+    # the second value tells whether this call created it.
+    max_bytes = max_bytes or current_app.config['DOCUMENT_MAX_BYTES']
+    os.makedirs(folder(), exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=folder(), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise DocumentTooLarge(f"Documents may be at most {max_bytes // (1024 * 1024)} MB.")
+                digest.update(chunk)
+                out.write(chunk)
+
+        name = digest.hexdigest()
+        path = path_for(name)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            return name, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return name, True
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def remove(name):
+    try:
+        os.remove(path_for(name))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+from models import db, User, Professional, Service
+
+YIELD_PER = 1000
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# Column selects rather than ORM entities, so streamed rows never pile up in
+# the session's identity map. Passwords are never exported.
+TABLES = {
+    'service': [
+        Service.id, Service.name, Service.price, Service.description, Service.address, Service.status,
+        Service.date_created, Service.customer_id, Service.professional_id, Service.created_by,
+        Service.rating, Service.remarks,
+    ],
+    'user': [User.id, User.name, User.email, User.role, User.address, User.pincode, User.mobile],
+    'professional': [
+        Professional.id, User.name, User.email, Professional.service_domain, Professional.experience,
+        Professional.status, Professional.documents,
+    ],
+}
+
+
+def build_query(table, status=None, name=None, date_from=None, date_to=None, role=None):
+    stmt = select(*TABLES[table])
+    if table == 'service':
+        if status:
+            stmt = stmt.where(Service.status == status)
+        if name:
+            stmt = stmt.where(Service.name == name)
+        # date_created is stored as 'YYYY-MM-DD HH:MM:SS', so string order is
+        # chronological order.
+        if date_from:
+            stmt = stmt.where(Service.date_created >= date_from)
+        if date_to:
+            stmt = stmt.where(Service.date_created < date_to + '~')
+        return stmt.order_by(Service.id)
+    if table == 'professional':
+        stmt = stmt.join(User, User.id == Professional.id)
+        if status:
+            stmt = stmt.where(Professional.status == status)
+        if name:
+            stmt = stmt.where(Professional.service_domain == name)
+        return stmt.order_by(Professional.id)
+    if role:
+        stmt = stmt.where(User.role == role)
+    return stmt.order_by(User.id)
+
+
+def column_names(table):
+    return [column.key for column in TABLES[table]]
+
+
+def stream_rows(stmt):
+    result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def csv_lines(names, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    yield buffer.getvalue()
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def ndjson_lines(names, partitions):
+    for rows in partitions:
+        yield ''.join(json.dumps(dict(zip(names, row)), default=str) + '\n' for row in rows)
+
+
+def generate(table, fmt, **filters):
+    names = column_names(table)
+    partitions = stream_rows(build_query(table, **filters))
+    if fmt == 'csv':
+        return csv_lines(names, partitions)
+    return ndjson_lines(names, partitions)
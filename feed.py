@@ -0,0 +1,141 @@
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import transitions
+
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_BUFFER = 100
+HISTORY = 1000
+
+
+class Subscriber(queue.Queue):
+    dropped = False
+
+
+class Hub:
+    # In-process publish/subscribe. Each subscriber is a bounded queue, so a
+    # client that stops reading is dropped instead of growing memory.
+    def __init__(self):
+        self._subscribers = {}
+        self._history = deque(maxlen=HISTORY)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics, last_event_id=None):
+        subscriber = Subscriber(maxsize=SUBSCRIBER_BUFFER)
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, set()).add(subscriber)
+            # Replays what a reconnecting EventSource missed, as far back as
+            # the history goes.
+            if last_event_id is not None:
+                for event_id, topic, data in self._history:
+                    if event_id > last_event_id and topic in topics:
+                        subscriber.put_nowait((event_id, data))
+                        if subscriber.full():
+                            break
+        return subscriber
+
+    def unsubscribe(self, topics, subscriber):
+        with self._lock:
+            for topic in topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topic, data):
+        with self._lock:
+            event_id = next(self._ids)
+            self._history.append((event_id, topic, data))
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event_id, data))
+            except queue.Full:
+                subscriber.dropped = True
+                self.unsubscribe([topic], subscriber)
+
+
+hub = Hub()
+
+
+def domain_topic(name):
+    return f'domain:{name}'
+
+
+def professional_topic(professional_id):
+    return f'professional:{professional_id}'
+
+
+def service_changed(session, service_id, old, new):
+    if new is None:
+        return
+    old_status = old[2] if old else None
+    name, professional_id, status, _ = new
+    if old_status == status:
+        return
+    data = {'id': service_id, 'name': name, 'status': status, 'previous_status': old_status}
+    # Held on the session until it commits, so listeners never see a change
+    # that was rolled back.
+    events = session.info.setdefault('feed_events', [])
+    # Professionals in the domain see requests appear and disappear from
+    # the open queue; the assigned professional sees every status change.
+    if 'requested' in (old_status, status):
+        events.append((domain_topic(name), data))
+    if professional_id is not None:
+        events.append((professional_topic(professional_id), data))
+
+
+transitions.service_listeners.append(service_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def publish_committed(session):
+    for topic, data in session.info.pop('feed_events', []):
+        hub.publish(topic, data)
+
+
+@event.listens_for(Session, 'after_rollback')
+def drop_uncommitted(session):
+    session.info.pop('feed_events', None)
+
+
+def streaming():
+    # An open stream holds its worker for as long as the page stays open.
+    # Under gevent that is one greenlet; under sync workers it would be a
+    # whole worker per dashboard, so the dashboard polls instead. The
+    # FEED_STREAMING setting overrides the detection.
+    if current_app.config['FEED_STREAMING'] is not None:
+        return current_app.config['FEED_STREAMING']
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def stream(topics, last_event_id=None):
+    subscriber = hub.subscribe(topics, last_event_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            if subscriber.dropped and subscriber.empty():
+                # Dropped for falling behind; the browser reconnects with
+                # Last-Event-ID and catches up from the history.
+                return
+            try:
+                event_id, data = subscriber.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {event_id}\nevent: service\ndata: {json.dumps(data)}\n\n"
+    finally:
+        hub.unsubscribe(topics, subscriber)
@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g
+from jinja2 import nodes
+from jinja2.ext import Extension
+from sqlalchemy import event, select
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import Session
+from models import db, DataVersion
+import transitions
+
+logger = logging.getLogger('fragments')
+
+MAX_FRAGMENTS = 512
+DEFAULT_TTL = 300
+
+# Only tables that fragments show are versioned, so job and rollup writes
+# do not pay for the extra UPDATE.
+VERSIONED = {'service', 'professional', 'user', 'customer'}
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def data_version(*tables):
+    # Part of a fragment key: a counter per table, bumped once the change has
+    # committed, so every worker and the CLI see it. The values are kept for
+    # the rest of the request; a view that reads them before its own queries
+    # can only ever cache newer rows under an older version, never the
+    # reverse.
+    versions = g.setdefault('data_versions', {})
+    missing = [table for table in tables if table not in versions]
+    if missing:
+        versions.update({table: 0 for table in missing})
+        versions.update(db.session.execute(
+            select(DataVersion.name, DataVersion.version).where(DataVersion.name.in_(missing))
+        ).all())
+    return tuple(versions[table] for table in tables)
+
+
+def mark_changed(session, tables):
+    session.info.setdefault('fragment_tables', set()).update(VERSIONED.intersection(tables))
+
+
+def bump(tables):
+    # A short transaction of its own, after the writer's has committed, so
+    # writers never queue behind each other on the counter rows. If it
+    # fails, the change shows once the fragments' TTL runs out.
+    try:
+        with db.engine.begin() as connection:
+            dialect = sqlite if connection.dialect.name == 'sqlite' else postgresql
+            stmt = dialect.insert(DataVersion).values([{'name': table, 'version': 1} for table in sorted(tables)])
+            stmt = stmt.on_conflict_do_update(index_elements=['name'], set_={'version': DataVersion.version + 1})
+            connection.execute(stmt)
+    except Exception:
+        logger.exception("could not bump the data versions of %s", ', '.join(sorted(tables)))
+
+
+def get(key):
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return entry[1]
+
+
+def put(key, value, ttl):
+    with _lock:
+        _cache[key] = (time.monotonic() + ttl, value)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_FRAGMENTS:
+            _cache.popitem(last=False)
+
+
+class FragmentCacheExtension(Extension):
+    # {% cache key, ttl %}...{% endcache %} renders the body once per key and
+    # serves it from memory until the TTL runs out. The key should include
+    # data_version() of the tables the body shows and anything else it
+    # depends on, such as the page cursor in request.full_path.
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(DEFAULT_TTL))
+        args.append(nodes.Const(parser.name))
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cache', args), [], [], body).set_lineno(lineno)
+
+    def _cache(self, key, ttl, template, caller):
+        key = (template, key)
+        value = get(key)
+        if value is None:
+            # Markup when the template autoescapes, so the cached copy is
+            # not escaped a second time.
+            value = caller()
+            put(key, value, ttl)
+        return value
+
+
+# Core UPDATEs in transitions.py skip the flush hook below.
+def services_changed(session, service_id, old, new):
+    mark_changed(session, ['service'])
+
+
+def professionals_changed(session, professional_ids):
+    if professional_ids:
+        mark_changed(session, ['professional'])
+
+
+transitions.service_listeners.append(services_changed)
+transitions.professional_listeners.append(professionals_changed)
+
+
+@event.listens_for(Session, 'after_flush')
+def track_changed_tables(session, flush_context):
+    tables = {obj.__tablename__ for obj in session.new | session.dirty | session.deleted if hasattr(obj, '__tablename__')}
+    if tables:
+        mark_changed(session, tables)
+
+
+@event.listens_for(Session, 'after_commit')
+def bump_committed(session):
+    tables = session.info.pop('fragment_tables', None)
+    if tables:
+        bump(tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def drop_changed_tables(session):
+    session.info.pop('fragment_tables', None)
+
+
+def init_app(app):
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals['data_version'] = data_version
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from flask import g, session
+from sqlalchemy.orm import joinedload
+from models import db, User
+
+IDENTITY_TTL = 30
+MAX_IDENTITIES = 10000
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class Identity:
+    # A detached snapshot of the logged-in user, safe to share between
+    # requests and threads, unlike a session-bound User instance.
+    def __init__(self, user):
+        self.id = user.id
+        self.name = user.name
+        self.email = user.email
+        self.role = user.role
+        self.address = user.address
+        self.pincode = user.pincode
+        self.mobile = user.mobile
+        self.service_domain = user.professional.service_domain if user.professional else None
+        self.professional_status = user.professional.status if user.professional else None
+
+    def __repr__(self):
+        return f"<Identity {self.name}>"
+
+
+def load(user_id):
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(user_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    user = db.session.get(User, user_id, options=[joinedload(User.professional)])
+    identity = Identity(user) if user else None
+    with _lock:
+        if len(_cache) >= MAX_IDENTITIES:
+            _cache.clear()
+        _cache[user_id] = (now + IDENTITY_TTL, identity)
+    return identity
+
+
+def invalidate(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
+    if getattr(g, 'identity', None) is not None and g.identity.id == user_id:
+        g.pop('identity')
+
+
+def current_user():
+    if 'identity' not in g:
+        user_id = session.get('user_id')
+        g.identity = load(user_id) if user_id else None
+    return g.identity
+
+
+def load_identity():
+    current_user()
+
+
+def init_app(app):
+    app.before_request(load_identity)
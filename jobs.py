@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, update, delete, select, or_
+from sqlalchemy.orm import Session
+from models import db, Job, Professional
+import charts
+import rollups
+
+logger = logging.getLogger('jobs')
+
+HANDLERS = {}
+PURGE_INTERVAL = 3600
+
+_resumed = False
+_last_purge = None
+_resume_lock = threading.Lock()
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def enqueue(kind, created_by=None, **payload):
+    # The row is written in the caller's transaction and only handed to the
+    # pool once that transaction commits, so a job never runs against data
+    # that was rolled back.
+    job = Job(kind=kind, payload=json.dumps(payload), status='queued', created_by=created_by, date_created=now())
+    db.session.add(job)
+    db.session.flush()
+    db.session.info.setdefault('enqueued_jobs', []).append(job.id)
+    return job.id
+
+
+def background(func, *args):
+    # Fire-and-forget work on the same pool, for tasks that are cheap to
+    # lose and not worth a persistent row. False when there is no pool.
+    executor = current_app.extensions.get('jobs')
+    if executor is None:
+        return False
+    executor.submit(_in_app_context, current_app._get_current_object(), func, *args)
+    return True
+
+
+def _in_app_context(app, func, *args):
+    with app.app_context():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("background task %s failed", func.__name__)
+
+
+def submit(job_id):
+    # Workers need the application to open their own app context.
+    current_app.extensions['jobs'].submit(run, current_app._get_current_object(), job_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def submit_enqueued(session):
+    for job_id in session.info.pop('enqueued_jobs', []):
+        submit(job_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def drop_enqueued(session):
+    session.info.pop('enqueued_jobs', None)
+
+
+def run(app, job_id):
+    with app.app_context():
+        # Claiming is a conditional UPDATE, so when several processes resume
+        # the same queue each job still runs once.
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', attempts=Job.attempts + 1, date_started=now())
+            .returning(Job.kind, Job.payload)
+            .execution_options(synchronize_session=False)
+        ).first()
+        db.session.commit()
+        if not claimed:
+            return
+
+        kind, payload = claimed
+        try:
+            result = HANDLERS[kind](**json.loads(payload))
+            values = {'status': 'done', 'result': json.dumps(result), 'error': None}
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("job %s (%s) failed", job_id, kind)
+            values = {'status': 'failed', 'error': str(e)}
+
+        db.session.execute(
+            update(Job).where(Job.id == job_id).values(date_finished=now(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        purge_if_due()
+
+
+def purge():
+    # Finished jobs are only kept for their status URL; older ones go.
+    cutoff = (datetime.now() - timedelta(seconds=current_app.config['JOB_RETENTION_SECONDS'])).strftime('%Y-%m-%d %H:%M:%S')
+    deleted = db.session.execute(
+        delete(Job)
+        .where(Job.status.in_(['done', 'failed']), Job.date_finished < cutoff)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+def purge_if_due():
+    global _last_purge
+    with _resume_lock:
+        if _last_purge is not None and time.monotonic() - _last_purge < PURGE_INTERVAL:
+            return
+        _last_purge = time.monotonic()
+    purge()
+
+
+def resume():
+    # Jobs still queued never started; jobs running past the stale timeout
+    # belonged to a worker that went away.
+    stale = (datetime.now() - timedelta(seconds=current_app.config['JOB_STALE_SECONDS'])).strftime('%Y-%m-%d %H:%M:%S')
+    abandoned = or_(Job.date_started == None, Job.date_started < stale)
+    db.session.execute(
+        update(Job)
+        .where(Job.status == 'running', abandoned, Job.attempts >= current_app.config['JOB_MAX_ATTEMPTS'])
+        .values(status='failed', error='Gave up after too many attempts.', date_finished=now())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Job)
+        .where(Job.status == 'running', abandoned)
+        .values(status='queued')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    purge()
+    job_ids = db.session.execute(select(Job.id).where(Job.status == 'queued').order_by(Job.id)).scalars().all()
+    for job_id in job_ids:
+        submit(job_id)
+    return len(job_ids)
+
+
+def to_dict(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'date_created': job.date_created,
+        'date_started': job.date_started,
+        'date_finished': job.date_finished,
+    }
+
+
+def check_document(path):
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.read(1024)
+        f.seek(max(size - 1024, 0))
+        trailer = f.read()
+    if not header.startswith(b'%PDF-'):
+        raise ValueError("Document is not a PDF file.")
+    if b'%%EOF' not in trailer:
+        raise ValueError("Document is truncated.")
+    return {'size': size, 'version': header[5:8].decode('ascii', 'replace')}
+
+
+@handler('validate_document')
+def validate_document(professional_id, path):
+    # Uploads are only checked for an extension in the request; this reads
+    # the file itself. The outcome is kept on the professional, where
+    # manage_professionals shows it next to the document.
+    professional = db.session.get(Professional, professional_id)
+    if professional is None:
+        raise ValueError(f"Professional {professional_id} no longer exists.")
+    try:
+        result = check_document(path)
+    except (OSError, ValueError) as e:
+        professional.document_status = 'invalid'
+        professional.document_error = str(e)[:255]
+        db.session.commit()
+        raise
+    professional.document_status = 'valid'
+    professional.document_error = None
+    db.session.commit()
+    return result
+
+
+# Charts are pre-rendered with background() now; the handler stays for
+# render_chart rows still queued in existing databases.
+@handler('render_chart')
+def render_chart(key, spec):
+    png = charts.get_png(key, spec, current_app.config['SECRET_KEY'])
+    if png is None:
+        raise ValueError("Invalid chart spec.")
+    return {'key': key, 'size': len(png)}
+
+
+@handler('rebuild_rollups')
+def rebuild_rollups():
+    rollups.rebuild()
+    return {'mismatches': len(rollups.check())}
+
+
+def resume_once():
+    # Runs on each process's first request instead of at import, so
+    # importing the app (CLI commands, workers booting) touches no tables.
+    global _resumed
+    if _resumed:
+        return
+    with _resume_lock:
+        if not _resumed:
+            resume()
+            _resumed = True
+
+
+def init_app(app):
+    app.extensions['jobs'] = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'], thread_name_prefix='job')
+    app.before_request(resume_once)
@@ -1,12 +1,203 @@
+import os
 from flask import Flask
 
-app = Flask(__name__)
+import models
+import identity
+import metrics
+import jobs
+import catalog
+import fragments
+import passwords
+import rollups
+import search
+import bulk_import
+import bootstrap
+import routes
+import auth
+import customer
+import professional
+import admin
+import api
 
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'hello123'
+# Role blueprints a process can mount. APP_BLUEPRINTS (comma separated)
+# picks a subset, so e.g. the customer catalog and the admin analytics can
+# run as separate process groups with their own worker counts.
+BLUEPRINTS = {
+    'auth': auth.bp,
+    'customer': customer.bp,
+    'professional': professional.bp,
+    'admin': admin.bp,
+    'api': api.bp,
+}
+
+COMMANDS = [
+    bootstrap.init_db_command,
+    rollups.rebuild_rollups_command,
+    rollups.check_rollups_command,
+    search.rebuild_search_command,
+    bulk_import.import_data_command,
+]
+
+
+def database_url():
+    url = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
+    # Hosted PostgreSQL providers still hand out the old postgres:// scheme.
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url):
+    options = {
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    if url.startswith('sqlite'):
+        options['connect_args'] = {'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000}
+        if url in ('sqlite://', 'sqlite:///:memory:'):
+            return options
+    options['pool_size'] = int(os.environ.get('DB_POOL_SIZE', 10))
+    options['max_overflow'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    options['pool_timeout'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    return options
+
+
+def blueprint_urls():
+    # APP_BLUEPRINT_URLS="admin=https://admin.example.com,..." points links
+    # to blueprints this process does not mount at the process group that
+    # serves them. Unlisted ones stay relative, for a proxy that routes by
+    # path on one host.
+    urls = {}
+    for item in os.environ.get('APP_BLUEPRINT_URLS', '').split(','):
+        name, _, url = item.partition('=')
+        if name.strip():
+            urls[name.strip()] = url.strip().rstrip('/')
+    return urls
+
+
+def configure(app):
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url()
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'hello123'
+
+    # Queries slower than this many milliseconds are logged with their parameters
+    # and route, see metrics.record_query. Unset disables the log.
+    app.config['SLOW_QUERY_MS'] = float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None
+
+    # Applied to every new SQLite connection, see models.set_sqlite_pragmas.
+    app.config['SQLITE_PRAGMAS'] = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+    }
+
+    # Professional documents are stored by SHA-256 under DOCUMENT_FOLDER, see
+    # documents.py. Larger uploads are refused before the body is read.
+    app.config['DOCUMENT_FOLDER'] = os.environ.get('DOCUMENT_FOLDER', os.path.join(app.instance_path, 'documents'))
+    app.config['DOCUMENT_MAX_BYTES'] = int(os.environ.get('DOCUMENT_MAX_BYTES', 10 * 1024 * 1024))
+    # Werkzeug refuses any request body over this size before parsing it. It
+    # is sized for the admin's bulk imports; professional_signup checks the
+    # smaller document limit itself.
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 100 * 1024 * 1024))
+
+    # Professional dashboard updates, see feed.py. The event stream is used
+    # when the process runs under gevent (or FEED_STREAMING=on); otherwise
+    # the dashboard polls the API every FEED_POLL_SECONDS.
+    streaming = os.environ.get('FEED_STREAMING')
+    app.config['FEED_STREAMING'] = streaming.lower() in ('1', 'on', 'true', 'yes') if streaming else None
+    app.config['FEED_POLL_SECONDS'] = int(os.environ.get('FEED_POLL_SECONDS', 30))
+
+    # Background job pool, see jobs.py. Jobs left running longer than
+    # JOB_STALE_SECONDS by a worker that died are picked up again on startup.
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 4))
+    app.config['JOB_STALE_SECONDS'] = int(os.environ.get('JOB_STALE_SECONDS', 600))
+    app.config['JOB_MAX_ATTEMPTS'] = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    # Finished and failed jobs are deleted this long after they end.
+    app.config['JOB_RETENTION_SECONDS'] = int(os.environ.get('JOB_RETENTION_SECONDS', 7 * 24 * 3600))
+
+    # In-memory job matching index, see matching.py. Changed services are read
+    # back every MATCHING_SYNC_SECONDS (or right after a local commit) and the
+    # whole index is rebuilt in the background every MATCHING_REBUILD_SECONDS.
+    # Each sync re-reads MATCHING_SYNC_OVERLAP_SECONDS before its watermark,
+    # which has to exceed the longest write transaction.
+    app.config['MATCHING_SYNC_SECONDS'] = float(os.environ.get('MATCHING_SYNC_SECONDS', 5))
+    app.config['MATCHING_SYNC_OVERLAP_SECONDS'] = float(os.environ.get('MATCHING_SYNC_OVERLAP_SECONDS', 60))
+    app.config['MATCHING_REBUILD_SECONDS'] = float(os.environ.get('MATCHING_REBUILD_SECONDS', 300))
+
+    # Open catalog entries by category, see catalog.py. 'memory' keeps them
+    # per worker; 'filesystem' shares them (and their invalidation) between
+    # the workers on a host.
+    app.config['CATALOG_CACHE'] = os.environ.get('CATALOG_CACHE', 'memory')
+    app.config['CATALOG_CACHE_DIR'] = os.environ.get('CATALOG_CACHE_DIR', os.path.join(app.instance_path, 'cache', 'catalog'))
+    app.config['CATALOG_CACHE_TTL'] = int(os.environ.get('CATALOG_CACHE_TTL', 60))
+
+    # Password hashing, see passwords.py. The method is pbkdf2:<hash name>,
+    # the only kind this werkzeug has, plus its cost (iterations); stored
+    # hashes made with anything else are upgraded on login. At most
+    # PASSWORD_HASH_WORKERS hashes run at once and PASSWORD_HASH_QUEUE logins
+    # may wait for one before being turned away.
+    app.config['PASSWORD_HASH_ALGORITHM'] = os.environ.get('PASSWORD_HASH_ALGORITHM', 'pbkdf2:sha256')
+    app.config['PASSWORD_HASH_COST'] = int(os.environ.get('PASSWORD_HASH_COST', 260000))
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 64))
+
+    app.config['BLUEPRINT_URLS'] = blueprint_urls()
+
+
+def external_url_builder(app):
+    # Templates and redirects name endpoints of every role. When the
+    # blueprint is mounted elsewhere, the URL is built from a map holding
+    # all blueprints instead of failing with a BuildError.
+    reference = Flask(__name__)
+    for blueprint in BLUEPRINTS.values():
+        reference.register_blueprint(blueprint)
+
+    def build(error, endpoint, values):
+        name = endpoint.rpartition('.')[0]
+        if name not in BLUEPRINTS or name in app.blueprints:
+            return None
+        values = {key: value for key, value in values.items() if not key.startswith('_') and value is not None}
+        path = reference.url_map.bind('').build(endpoint, values)
+        return app.config['BLUEPRINT_URLS'].get(name, '') + path
+
+    return build
+
+
+def create_app(blueprints=None):
+    app = Flask(__name__)
+    configure(app)
+
+    if blueprints is None:
+        blueprints = os.environ.get('APP_BLUEPRINTS') or ','.join(BLUEPRINTS)
+    if isinstance(blueprints, str):
+        blueprints = [name.strip() for name in blueprints.split(',') if name.strip()]
+    unknown = set(blueprints) - set(BLUEPRINTS)
+    if unknown:
+        raise ValueError(f"Unknown blueprints: {', '.join(sorted(unknown))}")
+
+    models.db.init_app(app)
+    identity.init_app(app)
+    metrics.init_app(app)
+    jobs.init_app(app)
+    catalog.init_app(app)
+    fragments.init_app(app)
+    passwords.init_app(app)
+
+    app.register_blueprint(routes.bp)
+    for name in blueprints:
+        app.register_blueprint(BLUEPRINTS[name])
+    app.url_build_error_handlers.append(external_url_builder(app))
+
+    for command in COMMANDS:
+        app.cli.add_command(command)
+    return app
 
-from routes import *
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app = create_app()
+    with app.app_context():
+        bootstrap.init()
+    app.run(debug=True)
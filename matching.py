@@ -0,0 +1,265 @@
+import heapq
+import re
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from models import db, User, Professional, Service, ProfessionalRollup
+import jobs
+import transitions
+
+PREFIX_LENGTH = 3
+DEFAULT_LIMIT = 10
+PINCODE = re.compile(r'\b(\d{6})\b')
+
+Request = namedtuple('Request', 'id name description address pincode customer_name date_created')
+Candidate = namedtuple('Candidate', 'id name pincode mobile experience avg_rating')
+
+# domain -> pincode prefix -> {id: entry}. Open requests are services in the
+# requested state that no professional has taken yet.
+_requests = {}
+_professionals = {}
+_request_keys = {}
+_professional_keys = {}
+
+_dirty_professionals = set()
+_watermark = None
+_last_sync = 0
+_last_rebuild = None
+_rebuilding = False
+_sync_due = True
+
+_lock = threading.Lock()
+_sync_lock = threading.Lock()
+
+
+def prefix(pincode):
+    return (pincode or '')[:PREFIX_LENGTH]
+
+
+def shared_digits(a, b):
+    shared = 0
+    for x, y in zip(a or '', b or ''):
+        if x != y:
+            break
+        shared += 1
+    return shared
+
+
+def request_pincode(address, customer_pincode):
+    # A pincode written into the service address wins over the one on the
+    # customer's profile.
+    found = PINCODE.search(address or '')
+    return found.group(1) if found else customer_pincode
+
+
+def _put(index, keys, domain, item_id, entry, pincode):
+    _remove(index, keys, item_id)
+    if entry is None:
+        return
+    key = (domain, prefix(pincode))
+    index.setdefault(domain, {}).setdefault(key[1], {})[item_id] = entry
+    keys[item_id] = key
+
+
+def _remove(index, keys, item_id):
+    key = keys.pop(item_id, None)
+    if key is None:
+        return
+    domain, bucket_prefix = key
+    buckets = index[domain]
+    buckets[bucket_prefix].pop(item_id, None)
+    if not buckets[bucket_prefix]:
+        del buckets[bucket_prefix]
+        if not buckets:
+            del index[domain]
+
+
+def _nearest(index, domain, pincode, limit, rank):
+    # Buckets sharing more leading digits with the pincode are strictly
+    # closer, so they are searched first and the search stops once a whole
+    # distance band has filled the limit.
+    buckets = index.get(domain, {})
+    bands = {}
+    for bucket_prefix, entries in buckets.items():
+        bands.setdefault(shared_digits(bucket_prefix, prefix(pincode)), []).append(entries)
+
+    found = []
+    for band in sorted(bands, reverse=True):
+        scored = [
+            (rank(entry, shared_digits(entry.pincode, pincode)), entry)
+            for entries in bands[band] for entry in entries.values()
+        ]
+        found.extend(entry for _, entry in heapq.nsmallest(limit - len(found), scored, key=lambda item: item[0]))
+        if len(found) >= limit:
+            break
+    return found
+
+
+def _request_rows(*conditions):
+    return db.session.execute(select(
+        Service.id, Service.name, Service.description, Service.address, Service.status,
+        Service.professional_id, Service.date_created, Service.updated_at, User.name, User.pincode
+    ).join(User, Service.customer_id == User.id).where(*conditions))
+
+
+def _apply_requests(rows):
+    watermark = None
+    professional_ids = set()
+    for row in rows:
+        (service_id, name, description, address, status, professional_id,
+         date_created, updated_at, customer_name, customer_pincode) = row
+        pincode = request_pincode(address, customer_pincode)
+        entry = None
+        if status == 'requested' and professional_id is None:
+            entry = Request(service_id, name, description, address, pincode, customer_name, date_created)
+        _put(_requests, _request_keys, name, service_id, entry, pincode)
+        if professional_id is not None:
+            professional_ids.add(professional_id)
+        if updated_at and (watermark is None or updated_at > watermark):
+            watermark = updated_at
+    return watermark, professional_ids
+
+
+def _professional_rows(professional_ids=None):
+    ratings = select(
+        ProfessionalRollup.professional_id,
+        func.sum(ProfessionalRollup.rating_sum).label('rating_sum'),
+        func.sum(ProfessionalRollup.rating_count).label('rating_count')
+    ).group_by(ProfessionalRollup.professional_id).subquery()
+    stmt = select(
+        Professional.id, Professional.service_domain, Professional.status, Professional.experience,
+        User.name, User.pincode, User.mobile, ratings.c.rating_sum, ratings.c.rating_count
+    ).join(User, User.id == Professional.id).outerjoin(ratings, ratings.c.professional_id == Professional.id)
+    if professional_ids is not None:
+        stmt = stmt.where(Professional.id.in_(professional_ids))
+    return db.session.execute(stmt)
+
+
+def _apply_professionals(rows):
+    for professional_id, domain, status, experience, name, pincode, mobile, rating_sum, rating_count in rows:
+        entry = None
+        if status == 'approved':
+            avg_rating = rating_sum / rating_count if rating_count else None
+            entry = Candidate(professional_id, name, pincode, mobile, experience, avg_rating)
+        _put(_professionals, _professional_keys, domain, professional_id, entry, pincode)
+
+
+def rebuild():
+    global _watermark, _last_rebuild
+    started = datetime.utcnow()
+    requests = list(_request_rows(Service.status == 'requested', Service.professional_id == None))
+    professionals = list(_professional_rows())
+    with _lock:
+        _requests.clear()
+        _request_keys.clear()
+        _professionals.clear()
+        _professional_keys.clear()
+        _apply_requests(requests)
+        _apply_professionals(professionals)
+        _watermark = started
+        _last_rebuild = time.monotonic()
+
+
+def rebuild_in_background():
+    global _rebuilding
+    try:
+        with _sync_lock:
+            rebuild()
+    finally:
+        _rebuilding = False
+
+
+def sync():
+    # Picks up services touched since the last sync through the indexed
+    # updated_at column, which also covers changes made by other worker
+    # processes. Deleted rows only drop out on the periodic rebuild.
+    global _watermark, _last_sync, _sync_due, _rebuilding
+    # Only the first build is waited for; later syncs are skipped while
+    # another thread runs one (or the periodic rebuild) and the current
+    # index is served meanwhile.
+    if not _sync_lock.acquire(blocking=_last_rebuild is None):
+        return
+    try:
+        now = time.monotonic()
+        if _last_rebuild is None:
+            rebuild()
+        else:
+            if now - _last_rebuild > current_app.config['MATCHING_REBUILD_SECONDS'] and not _rebuilding:
+                _rebuilding = True
+                if not jobs.background(rebuild_in_background):
+                    _rebuilding = False
+                    rebuild()
+            if _sync_due or now - _last_sync > current_app.config['MATCHING_SYNC_SECONDS']:
+                # updated_at is set when a writer's UPDATE runs, not when it
+                # commits, so rows are read back from further than the
+                # longest write transaction before the watermark.
+                since = _watermark - timedelta(seconds=current_app.config['MATCHING_SYNC_OVERLAP_SECONDS'])
+                _sync_due = False
+                requests = list(_request_rows(Service.updated_at >= since))
+                with _lock:
+                    watermark, professional_ids = _apply_requests(requests)
+                    if watermark and watermark > _watermark:
+                        _watermark = watermark
+                    professional_ids |= _dirty_professionals
+                    _dirty_professionals.clear()
+                if professional_ids:
+                    professionals = list(_professional_rows(professional_ids))
+                    with _lock:
+                        _apply_professionals(professionals)
+        _last_sync = now
+    finally:
+        _sync_lock.release()
+
+
+def jobs_for(professional, limit=DEFAULT_LIMIT):
+    # Nearest open requests in the professional's domain, oldest first among
+    # equally close ones.
+    sync()
+    with _lock:
+        return _nearest(_requests, professional.service_domain, professional.pincode, limit,
+                        lambda entry, shared: (-shared, entry.id))
+
+
+def professionals_for(service, limit=DEFAULT_LIMIT):
+    # Nearest approved professionals for a request, best rated first among
+    # equally close ones. Unrated professionals come after rated ones.
+    sync()
+    customer_pincode = service.customer.user.pincode if service.customer else None
+    pincode = request_pincode(service.address, customer_pincode)
+    with _lock:
+        return _nearest(_professionals, service.name, pincode, limit,
+                        lambda entry, shared: (-shared, -(entry.avg_rating or 0), entry.id))
+
+
+def professionals_changed(session, professional_ids):
+    session.info.setdefault('matching_professionals', set()).update(professional_ids)
+
+
+transitions.professional_listeners.append(professionals_changed)
+
+
+@event.listens_for(Session, 'after_flush')
+def track_professional_changes(session, flush_context):
+    changed = [obj.id for obj in session.dirty if isinstance(obj, Professional)]
+    if changed:
+        professionals_changed(session, changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def schedule_sync(session):
+    global _sync_due
+    _sync_due = True
+    professional_ids = session.info.pop('matching_professionals', None)
+    if professional_ids:
+        with _lock:
+            _dirty_professionals.update(professional_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def drop_professional_changes(session):
+    session.info.pop('matching_professionals', None)
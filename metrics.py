@@ -0,0 +1,149 @@
+import bisect
+import logging
+import threading
+import time
+
+from flask import g, request, current_app, has_app_context, has_request_context, before_render_template, template_rendered, make_response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import charts
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+
+slow_query_log = logging.getLogger('slow_query')
+
+_lock = threading.Lock()
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, value, *labels):
+        with _lock:
+            series = self.values.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint',))
+REQUESTS = Counter('http_requests_total', 'Requests by endpoint and status code.', ('endpoint', 'status'))
+SQL_PER_REQUEST = Histogram('db_statements_per_request', 'SQL statements issued per request.', ('endpoint',), COUNT_BUCKETS)
+SQL_TIME = Counter('db_statement_seconds_total', 'Time spent executing SQL, by endpoint.', ('endpoint',))
+TEMPLATE_LATENCY = Histogram('template_render_duration_seconds', 'Jinja render time by template.', ('template',))
+CHART_LATENCY = Histogram('chart_render_duration_seconds', 'Chart render time by chart kind.', ('kind',))
+
+REGISTRY = [REQUEST_LATENCY, REQUESTS, SQL_PER_REQUEST, SQL_TIME, TEMPLATE_LATENCY, CHART_LATENCY]
+
+
+def _endpoint():
+    return request.endpoint or 'unknown'
+
+
+def start_request_timer():
+    g.metrics_started = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+
+
+def record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        endpoint = _endpoint()
+        REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint)
+        REQUESTS.inc(endpoint, response.status_code)
+        SQL_PER_REQUEST.observe(g.pop('sql_statements', 0), endpoint)
+        SQL_TIME.inc(endpoint, amount=g.pop('sql_seconds', 0.0))
+    return response
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    in_request = has_request_context()
+
+    threshold = current_app.config.get('SLOW_QUERY_MS') if has_app_context() else None
+    if threshold is not None and elapsed * 1000 >= threshold:
+        route = _endpoint() if in_request else 'none'
+        slow_query_log.warning("%.1f ms in %s: %s %r", elapsed * 1000, route, statement, parameters)
+
+    if in_request and 'sql_statements' in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+
+
+def _start_template_timer(sender, template, context, **extra):
+    g.setdefault('template_started', []).append(time.perf_counter())
+
+
+def _record_template(sender, template, context, **extra):
+    stack = g.get('template_started')
+    if stack:
+        TEMPLATE_LATENCY.observe(time.perf_counter() - stack.pop(), template.name or 'string')
+
+
+charts.render_listeners.append(lambda kind, seconds: CHART_LATENCY.observe(seconds, kind))
+
+
+def metrics():
+    with _lock:
+        lines = []
+        for metric in REGISTRY:
+            lines.extend(metric.render())
+    response = make_response('\n'.join(lines) + '\n')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+
+def init_app(app):
+    app.before_request(start_request_timer)
+    app.after_request(record_request)
+    before_render_template.connect(_start_template_timer, app)
+    template_rendered.connect(_record_template, app)
+    app.add_url_rule('/metrics', 'metrics', metrics)
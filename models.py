@@ -1,14 +1,31 @@
+import sqlite3
+from datetime import datetime
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
-from main import app
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+import passwords
+
+db = SQLAlchemy()
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection) or not has_app_context():
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in current_app.config.get('SQLITE_PRAGMAS', {}).items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
 
-db = SQLAlchemy(app)
 
 class User(db.Model):
     __tablename__ = 'user'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password = db.Column(db.String(120), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(80), nullable=False)
     address = db.Column(db.String(200), nullable=True)
     pincode = db.Column(db.String(6), nullable=True)
@@ -21,7 +38,7 @@ class User(db.Model):
         return f"<User {self.name}>"
 
     def check_password(self, password):
-        return self.password == password
+        return passwords.verify(self.password, password)
 
 
 class Customer(db.Model):
@@ -38,8 +55,12 @@ class Professional(db.Model):
     service_domain = db.Column(db.String(120), nullable=False)
     experience = db.Column(db.Integer, nullable=False)
     documents = db.Column(db.String(120), nullable=True)
+    # Outcome of the validate_document job, see jobs.py: None until it has
+    # run, then 'valid' or 'invalid' with the reason in document_error.
+    document_status = db.Column(db.String(20), nullable=True)
+    document_error = db.Column(db.String(255), nullable=True)
 
-    status = db.Column(db.String(20), default='pending')
+    status = db.Column(db.String(20), default='pending', index=True)
 
     def __repr__(self):
         return f"<Professional {self.user.name}>"
@@ -47,6 +68,13 @@ class Professional(db.Model):
 
 class Service(db.Model):
     __tablename__ = 'service'
+    __table_args__ = (
+        db.Index('ix_service_name_status', 'name', 'status'),
+        db.Index('ix_service_name_customer', 'name', 'customer_id'),
+        db.Index('ix_service_customer_id', 'customer_id', 'id'),
+        db.Index('ix_service_customer_status', 'customer_id', 'status'),
+        db.Index('ix_service_professional_status', 'professional_id', 'status'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     price = db.Column(db.Float, nullable=True)
@@ -54,12 +82,15 @@ class Service(db.Model):
     address = db.Column(db.String(255))
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False) 
     creator = db.relationship('User', backref='created_services')
-    status = db.Column(db.String(50), default='accepted')
-    date_created = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(50), default='accepted', index=True)
+    date_created = db.Column(db.String(50), nullable=False, index=True)
     professional_id = db.Column(db.Integer, db.ForeignKey('professional.id'), nullable=True) 
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=True)
     remarks = db.Column(db.Text, nullable=True)
     rating = db.Column(db.Integer, nullable=True)
+    # Bumped by every ORM and Core UPDATE, the row version behind the API's
+    # ETag and Last-Modified headers.
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     professional = db.relationship('Professional', backref='assigned_services', lazy=True)
     customer = db.relationship('Customer', backref='booked_services', lazy=True)
@@ -67,14 +98,97 @@ class Service(db.Model):
     def __repr__(self):
         return f"<Service {self.name}>"
 
-with app.app_context():
-    db.create_all()
+class ServiceRollup(db.Model):
+    __tablename__ = 'service_rollup'
+    name = db.Column(db.String(100), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ServiceRollup {self.name} {self.status}>"
+
+
+class ProfessionalRollup(db.Model):
+    __tablename__ = 'professional_rollup'
+    professional_id = db.Column(db.Integer, db.ForeignKey('professional.id'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ProfessionalRollup {self.professional_id} {self.status}>"
+
+class DataVersion(db.Model):
+    # One counter per table, bumped after each commit that changes the
+    # table, see fragments.py.
+    __tablename__ = 'data_version'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DataVersion {self.name} {self.version}>"
+
+
+class Job(db.Model):
+    __tablename__ = 'job'
+    __table_args__ = (
+        db.Index('ix_job_status_id', 'status', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    date_created = db.Column(db.String(50), nullable=False)
+    date_started = db.Column(db.String(50), nullable=True)
+    date_finished = db.Column(db.String(50), nullable=True)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} {self.status}>"
+
+# professional_search filters on date(date_created), which a plain column
+# index cannot serve. SQLite only: PostgreSQL refuses date() of a string
+# column in an index, as it is not IMMUTABLE there, and scans instead.
+created_day_index = db.Index('ix_service_created_day', db.func.date(Service.date_created)).ddl_if(dialect='sqlite')
+
+
+def migrate():
+    # create_all() skips tables that already exist, so columns and indexes
+    # added to an existing database.db have to be created separately.
+    # Added columns start out NULL for existing rows.
+    preparer = db.engine.dialect.identifier_preparer
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                with db.engine.begin() as connection:
+                    connection.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+                    ))
+        # Reflection skips expression indexes such as ix_service_created_day,
+        # so checkfirst would create them a second time; IF NOT EXISTS does not.
+        with db.engine.begin() as connection:
+            for index in table.indexes:
+                if index is created_day_index and connection.dialect.name != 'sqlite':
+                    continue
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def seed_admin():
     first_admin = User.query.filter_by(role='admin').first()
     if not first_admin:
         admin = User(
             name="admin",
             email="admin@example.com",
-            password="admin",  
+            password=passwords.hash_password("admin"),
             role="admin",
             address="",      
             pincode="",       
@@ -84,3 +198,7 @@ with app.app_context():
         db.session.commit()
 
 
+def init_db():
+    db.create_all()
+    migrate()
+    seed_admin()
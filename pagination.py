@@ -0,0 +1,97 @@
+from flask import request, url_for
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+class Page:
+    def __init__(self, items, per_page, prefix, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.prefix = prefix
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def _url(self, **cursor):
+        args = request.args.to_dict()
+        args.pop(self.prefix + 'after', None)
+        args.pop(self.prefix + 'before', None)
+        args[self.prefix + 'per_page'] = self.per_page
+        args.update({self.prefix + name: value for name, value in cursor.items()})
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    def next_url(self):
+        return self._url(after=self.next_cursor)
+
+    def prev_url(self):
+        return self._url(before=self.prev_cursor)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def page_args(prefix):
+    per_page = request.args.get(prefix + 'per_page', DEFAULT_PER_PAGE, type=int)
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    after = request.args.get(prefix + 'after', type=int)
+    before = request.args.get(prefix + 'before', type=int)
+    return per_page, after, before
+
+
+def paginate(query, column, key=None, prefix='', descending=True):
+    # Keyset pagination: the cursor is the last (or first) id shown, so every
+    # page is an index range scan no matter how deep the client goes.
+    per_page, after, before = page_args(prefix)
+    if key is None:
+        key = lambda item: getattr(item, column.key)
+
+    forward = column.desc() if descending else column.asc()
+    backward = column.asc() if descending else column.desc()
+
+    if before is not None:
+        condition = column > before if descending else column < before
+        rows = query.filter(condition).order_by(backward).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        prev_cursor = key(items[0]) if has_more else None
+        next_cursor = key(items[-1]) if items else None
+    else:
+        if after is not None:
+            query = query.filter(column < after if descending else column > after)
+        rows = query.order_by(forward).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = rows[:per_page]
+        next_cursor = key(items[-1]) if has_more else None
+        prev_cursor = key(items[0]) if after is not None and items else None
+
+    return Page(items, per_page, prefix, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def paginate_items(items, key, prefix=''):
+    # The same cursors over a list already sorted newest first, for results
+    # served from memory instead of a query, see catalog.py.
+    per_page, after, before = page_args(prefix)
+
+    if before is not None:
+        newer = [item for item in items if key(item) > before]
+        page = newer[-per_page:]
+        prev_cursor = key(page[0]) if len(newer) > per_page else None
+        next_cursor = key(page[-1]) if page else None
+    else:
+        rest = items if after is None else [item for item in items if key(item) < after]
+        page = rest[:per_page]
+        next_cursor = key(page[-1]) if len(rest) > per_page else None
+        prev_cursor = key(page[0]) if after is not None and page else None
+
+    return Page(page, per_page, prefix, next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,90 @@
+import hashlib
+import hmac
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASHED = re.compile(r'pbkdf2:\w+:\d+\$[^$]+\$[0-9a-f]+')
+
+Pool = namedtuple('Pool', 'executor slots')
+
+
+class Busy(RuntimeError):
+    pass
+
+
+def check_method(algorithm, cost):
+    # The werkzeug in requirements.txt only hashes with pbkdf2, as
+    # pbkdf2:<hash name>:<iterations>; anything else would fail on the first
+    # signup rather than here.
+    name, _, hash_name = algorithm.partition(':')
+    if name != 'pbkdf2' or hash_name not in hashlib.algorithms_guaranteed:
+        raise ValueError(f"PASSWORD_HASH_ALGORITHM must be pbkdf2:<hash name>, such as pbkdf2:sha256, not {algorithm!r}.")
+    if cost < 1:
+        raise ValueError(f"PASSWORD_HASH_COST must be a positive number of iterations, not {cost}.")
+
+
+def method():
+    return f"{current_app.config['PASSWORD_HASH_ALGORITHM']}:{current_app.config['PASSWORD_HASH_COST']}"
+
+
+def _run(func, *args):
+    # A hash holds a core for tens of milliseconds. The pool caps how many
+    # run at once, and callers beyond PASSWORD_HASH_QUEUE are turned away
+    # instead of tying up every request worker during a login storm.
+    pool = current_app.extensions.get('passwords')
+    if pool is None:
+        return func(*args)
+    if not pool.slots.acquire(blocking=False):
+        raise Busy("Too many logins in progress, please try again in a moment.")
+    future = pool.executor.submit(func, *args)
+    future.add_done_callback(lambda _: pool.slots.release())
+    return future.result()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, method())
+
+
+def hash_many(passwords):
+    # For imports: no queue limit, but still no more threads than the pool.
+    hasher = partial(generate_password_hash, method=method())
+    pool = current_app.extensions.get('passwords')
+    if pool is None:
+        return [hasher(password) for password in passwords]
+    return list(pool.executor.map(hasher, passwords))
+
+
+def is_hashed(stored):
+    return bool(stored and HASHED.fullmatch(stored))
+
+
+def verify(stored, password):
+    if stored is None or password is None:
+        # Unknown account: spend a hash anyway, so the response time does not
+        # tell which emails are registered.
+        _run(generate_password_hash, password or '', method())
+        return False
+    if not is_hashed(stored):
+        # Rows written before passwords were hashed, see needs_rehash.
+        return hmac.compare_digest(stored.encode('utf8'), password.encode('utf8'))
+    return _run(check_password_hash, stored, password)
+
+
+def needs_rehash(stored):
+    # Plaintext rows and hashes made with another method or cost are
+    # replaced on the user's next successful login.
+    return not is_hashed(stored) or stored.split('$', 1)[0] != method()
+
+
+def init_app(app):
+    check_method(app.config['PASSWORD_HASH_ALGORITHM'], app.config['PASSWORD_HASH_COST'])
+    app.extensions['passwords'] = Pool(
+        ThreadPoolExecutor(max_workers=app.config['PASSWORD_HASH_WORKERS'], thread_name_prefix='hash'),
+        threading.BoundedSemaphore(app.config['PASSWORD_HASH_QUEUE'])
+    )
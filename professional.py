@@ -0,0 +1,155 @@
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, session, flash, abort, Response
+from models import User, Customer, db, Service
+import queries
+import stats
+import pagination
+import search
+import identity
+import transitions
+import feed
+import matching
+from routes import chart_url
+from sqlalchemy import func
+
+bp = Blueprint('professional', __name__)
+
+@bp.route('/professional_dashboard')
+def professional_dashboard():
+    if session.get('role') == 'professional':
+        professional = identity.current_user()
+
+        if not professional or professional.role != 'professional':
+            flash('Professional not found.', 'error')
+            return redirect(url_for('auth.login'))
+
+        domain = professional.service_domain
+        if not domain:
+            flash('No service domain assigned to this professional.', 'error')
+            return redirect(url_for('auth.login'))
+
+        service_of_row = lambda row: row[0].id
+
+        pending_services = pagination.paginate(queries.professional_queue(professional, 'inprogress'),
+                                               Service.id, key=service_of_row, prefix='pending_')
+        today_services = pagination.paginate(queries.professional_queue(professional, 'requested'),
+                                             Service.id, key=service_of_row, prefix='today_')
+        completed_services = pagination.paginate(queries.professional_queue(professional, 'completed'),
+                                                 Service.id, key=service_of_row, prefix='completed_')
+
+        nearby_services = matching.jobs_for(professional, limit=5)
+
+        return render_template(
+            'professional_dashboard.html',
+            professional=professional,
+            nearby_services=nearby_services,
+            pending_services=pending_services,
+            today_services=today_services,
+            completed_services=completed_services,
+            feed_streaming=feed.streaming(),
+            feed_poll_seconds=current_app.config['FEED_POLL_SECONDS']
+        )
+
+    flash('Access denied. Please log in.', 'error')
+    return redirect(url_for('auth.login'))
+
+@bp.route('/professional_feed')
+def professional_feed():
+    professional = identity.current_user()
+    if not professional or professional.role != 'professional' or not professional.service_domain:
+        abort(403)
+    # Under sync workers every open stream would hold a worker, see
+    # feed.streaming; the dashboard polls the API instead.
+    if not feed.streaming():
+        abort(404)
+
+    # Deliberately not wrapped in stream_with_context: the request context,
+    # and with it the database session, is released as soon as the stream
+    # starts.
+    topics = [feed.domain_topic(professional.service_domain), feed.professional_topic(professional.id)]
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    response = Response(feed.stream(topics, last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.route('/professional_search', methods=['GET', 'POST'])
+def professional_search():
+    user_id = session.get('user_id')
+
+    service_requests = []
+
+    search_by = request.values.get('search_by', '')
+    search_input = request.values.get('search_input', '')
+    query = Service.query.filter(Service.professional_id == user_id).options(queries.service_customer_user())
+
+    if search_by == 'location' and search_input:
+        service_requests = search.ranked(query, search_input, ['address'])
+    elif search_by == 'customer_name' and search_input:
+        service_requests = search.ranked(query, search_input, ['customer_name'])
+    elif search_by == 'date' and search_input:
+        service_requests = pagination.paginate(query.filter(func.date(Service.date_created) == search_input), Service.id)
+
+    return render_template('professional_search.html', service_requests=service_requests)
+
+@bp.route('/professional_summary')
+def professional_summary():
+    professional = identity.current_user()
+
+    if not professional or professional.role != 'professional':
+        return redirect(url_for('auth.login'))
+
+    professional_stats = stats.professional_stats(professional.id)
+    avg_rating = professional_stats['avg_rating']
+    service_counts = [(status, count) for status, count in professional_stats['counts'].items() if count]
+
+    ratings_plot = None
+    if avg_rating is not None:
+        ratings_plot = chart_url('rating_bar', {'title': 'Professional Average Rating', 'avg_rating': round(avg_rating, 2)})
+
+    services_plot = None
+    if service_counts:
+        services_plot = chart_url('status_pie', [[status, count] for status, count in service_counts])
+
+    total_services_accepted = professional_stats['accepted']
+    completion_rate = professional_stats['completion_rate']
+
+    return render_template('professional_summary.html', 
+                           professional=professional,
+                           ratings_plot=ratings_plot, 
+                           services_plot=services_plot, 
+                           avg_rating=avg_rating, 
+                           total_services_accepted=total_services_accepted, 
+                           completion_rate=completion_rate)
+
+@bp.route('/view_service/<int:service_id>', methods=['GET'])
+def view_service(service_id):
+    service = db.session.query(Service).join(Service.customer).join(Customer.user) \
+                        .options(queries.joined_customer_user()) \
+                        .filter(Service.id == service_id).first_or_404()
+    
+    return render_template('view_service.html', service=service)
+
+@bp.route('/accept_service/<int:service_id>', methods=['POST'])
+def accept_service(service_id):
+    professional = session.get('user_id')
+    if professional:
+        try:
+            accepted = transitions.accept(service_id, professional)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            flash(f"An error occurred while accepting the service: {e}", "danger")
+            return redirect(url_for('professional.professional_dashboard'))
+
+        if accepted:
+            flash("Service accepted successfully.", "success")
+        elif db.session.get(Service, service_id) is None:
+            abort(404)
+        else:
+            flash("This service is already in progress.", "warning")
+
+        return redirect(url_for('professional.professional_dashboard'))
+    else:
+        flash("Professional not found or service not available.", "danger")
+        return redirect(url_for('professional.view_service', service_id=service_id)) 
+    
@@ -0,0 +1,52 @@
+from sqlalchemy.orm import joinedload, contains_eager, configure_mappers
+from models import db, User, Customer, Professional, Service
+
+# Customer.user / Professional.user are backrefs, they only exist on the
+# classes once the mappers have been configured.
+configure_mappers()
+
+
+def service_customer_user():
+    return joinedload(Service.customer).joinedload(Customer.user)
+
+
+def service_professional_user():
+    return joinedload(Service.professional).joinedload(Professional.user)
+
+
+def joined_customer_user():
+    return contains_eager(Service.customer).contains_eager(Customer.user)
+
+
+def customer_user():
+    return joinedload(Customer.user)
+
+
+def professional_user():
+    return joinedload(Professional.user)
+
+
+def services_with_people(query=None):
+    if query is None:
+        query = Service.query
+    return query.options(service_customer_user(), service_professional_user())
+
+
+def professionals_by_status(status):
+    return Professional.query.options(professional_user()).filter_by(status=status)
+
+
+def customers_with_users():
+    return Customer.query.options(customer_user())
+
+
+# The professional dashboard's lists, also served by the API: open requests
+# in the professional's domain, and their own services by status.
+PROFESSIONAL_QUEUES = ('inprogress', 'requested', 'completed')
+
+
+def professional_queue(professional, status):
+    query = db.session.query(Service, User).join(User, Service.customer_id == User.id)
+    if status == 'requested':
+        return query.filter(Service.name == professional.service_domain, Service.status == 'requested')
+    return query.filter(Service.professional_id == professional.id, Service.status == status)
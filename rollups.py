@@ -0,0 +1,170 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect, func, delete, insert, select
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import Session
+from models import db, Service, ServiceRollup, ProfessionalRollup
+import transitions
+
+TRACKED = ('name', 'professional_id', 'status', 'rating')
+
+
+def state_of(name, professional_id, status, rating):
+    if rating in (None, ''):
+        rating = None
+    else:
+        rating = int(rating)
+    return (name, professional_id, status, rating)
+
+
+def current_state(service):
+    return state_of(*(getattr(service, key) for key in TRACKED))
+
+
+def previous_state(service):
+    attrs = inspect(service).attrs
+    values = []
+    for key in TRACKED:
+        history = attrs[key].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(None)
+    return state_of(*values)
+
+
+def _upsert(connection, model, keys, count, rating_sum, rating_count):
+    dialect = sqlite if connection.dialect.name == 'sqlite' else postgresql
+    stmt = dialect.insert(model).values(count=count, rating_sum=rating_sum, rating_count=rating_count, **keys)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={
+            'count': model.count + stmt.excluded.count,
+            'rating_sum': model.rating_sum + stmt.excluded.rating_sum,
+            'rating_count': model.rating_count + stmt.excluded.rating_count,
+        }
+    )
+    connection.execute(stmt)
+
+
+def apply_change(connection, old, new):
+    if old == new:
+        return
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        name, professional_id, status, rating = state
+        rated = 1 if rating is not None else 0
+        values = (sign, sign * (rating or 0), sign * rated)
+        _upsert(connection, ServiceRollup, {'name': name, 'status': status}, *values)
+        if professional_id is not None:
+            _upsert(connection, ProfessionalRollup, {'professional_id': professional_id, 'status': status}, *values)
+
+
+def record_inserts(connection, states):
+    # Batched version of apply_change(None, state) for bulk loads: one upsert
+    # per (name, status) and (professional, status) group instead of per row.
+    totals = {}
+    for name, professional_id, status, rating in states:
+        keys = [(ServiceRollup, (('name', name), ('status', status)))]
+        if professional_id is not None:
+            keys.append((ProfessionalRollup, (('professional_id', professional_id), ('status', status))))
+        for key in keys:
+            count, rating_sum, rating_count = totals.get(key, (0, 0, 0))
+            totals[key] = (count + 1, rating_sum + (rating or 0), rating_count + (rating is not None))
+    for (model, keys), values in totals.items():
+        _upsert(connection, model, dict(keys), *values)
+
+
+@event.listens_for(Session, 'after_flush')
+def track_service_changes(session, flush_context):
+    # Runs inside the flush, so the rollups commit or roll back together
+    # with the Service rows that changed. The same changes go to the
+    # transitions listeners, which see Core UPDATEs from transitions.py the
+    # same way.
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Service):
+            changes.append((obj.id, None, current_state(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, Service) and session.is_modified(obj, include_collections=False):
+            changes.append((obj.id, previous_state(obj), current_state(obj)))
+    for obj in session.deleted:
+        if isinstance(obj, Service):
+            changes.append((obj.id, previous_state(obj), None))
+
+    if changes:
+        connection = session.connection()
+        for service_id, old, new in changes:
+            apply_change(connection, old, new)
+            for listener in transitions.service_listeners:
+                listener(session, service_id, old, new)
+
+
+def _service_totals(*keys):
+    return select(
+        *keys,
+        func.count(Service.id),
+        func.coalesce(func.sum(Service.rating), 0),
+        func.count(Service.rating)
+    ).group_by(*keys)
+
+
+def rebuild():
+    db.session.execute(delete(ServiceRollup))
+    db.session.execute(delete(ProfessionalRollup))
+    db.session.execute(insert(ServiceRollup).from_select(
+        ['name', 'status', 'count', 'rating_sum', 'rating_count'],
+        _service_totals(Service.name, Service.status)
+    ))
+    db.session.execute(insert(ProfessionalRollup).from_select(
+        ['professional_id', 'status', 'count', 'rating_sum', 'rating_count'],
+        _service_totals(Service.professional_id, Service.status).where(Service.professional_id != None)
+    ))
+    db.session.commit()
+
+
+def check():
+    mismatches = []
+    tables = [
+        (ServiceRollup, (ServiceRollup.name, ServiceRollup.status), _service_totals(Service.name, Service.status)),
+        (ProfessionalRollup, (ProfessionalRollup.professional_id, ProfessionalRollup.status),
+         _service_totals(Service.professional_id, Service.status).where(Service.professional_id != None)),
+    ]
+    for model, keys, totals in tables:
+        expected = {tuple(row[:2]): tuple(row[2:]) for row in db.session.execute(totals)}
+        actual = {
+            tuple(row[:2]): tuple(row[2:])
+            for row in db.session.execute(select(*keys, model.count, model.rating_sum, model.rating_count))
+            if any(row[2:])
+        }
+        for key in sorted(set(expected) | set(actual), key=str):
+            if expected.get(key) != actual.get(key):
+                mismatches.append((model.__tablename__, key, expected.get(key), actual.get(key)))
+    return mismatches
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    rebuild()
+    click.echo("Rollups rebuilt.")
+
+
+@click.command('check-rollups')
+@with_appcontext
+def check_rollups_command():
+    mismatches = check()
+    for table, key, expected, actual in mismatches:
+        click.echo(f"{table} {key}: expected {expected}, found {actual}")
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} rollup rows are out of date, run `flask rebuild-rollups`.")
+    click.echo("Rollups are consistent.")
+
+
+def backfill():
+    # Databases created before the rollup tables existed start out empty.
+    if db.session.query(Service.id).first() and not db.session.query(ServiceRollup.name).first():
+        rebuild()
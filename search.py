@@ -0,0 +1,112 @@
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text, inspect, Integer, Float, or_
+from models import db, User, Customer, Professional, Service
+
+SEARCH_LIMIT = 100
+COLUMNS = ('name', 'description', 'address', 'customer_name', 'professional_name')
+
+_INDEXED_ROW = """
+    SELECT s.id, s.name, s.description, s.address, cu.name, pu.name
+    FROM service s
+    LEFT JOIN "user" cu ON cu.id = s.customer_id
+    LEFT JOIN "user" pu ON pu.id = s.professional_id
+"""
+
+# The triggers keep the index in step with every write, including the ones
+# that bypass the ORM.
+SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS service_search USING fts5(
+        name, description, address, customer_name, professional_name,
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS service_search_insert AFTER INSERT ON service BEGIN
+        INSERT INTO service_search(rowid, name, description, address, customer_name, professional_name)
+        {_INDEXED_ROW} WHERE s.id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS service_search_update
+        AFTER UPDATE OF name, description, address, customer_id, professional_id ON service BEGIN
+        DELETE FROM service_search WHERE rowid = old.id;
+        INSERT INTO service_search(rowid, name, description, address, customer_name, professional_name)
+        {_INDEXED_ROW} WHERE s.id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS service_search_delete AFTER DELETE ON service BEGIN
+        DELETE FROM service_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS service_search_user_name AFTER UPDATE OF name ON "user" BEGIN
+        UPDATE service_search SET customer_name = new.name
+            WHERE rowid IN (SELECT id FROM service WHERE customer_id = new.id);
+        UPDATE service_search SET professional_name = new.name
+            WHERE rowid IN (SELECT id FROM service WHERE professional_id = new.id);
+    END""",
+]
+
+
+def enabled():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def create_index():
+    created = not inspect(db.engine).has_table('service_search')
+    with db.engine.begin() as connection:
+        for statement in SCHEMA:
+            connection.execute(text(statement))
+    if created:
+        rebuild()
+
+
+def rebuild():
+    with db.engine.begin() as connection:
+        connection.execute(text("DELETE FROM service_search"))
+        connection.execute(text(
+            "INSERT INTO service_search(rowid, name, description, address, customer_name, professional_name)"
+            + _INDEXED_ROW
+        ))
+
+
+def match_expression(terms, columns=None):
+    # Every word becomes a quoted prefix token, so user input can never be
+    # parsed as FTS5 query syntax.
+    tokens = re.findall(r'\w+', terms or '')
+    if not tokens:
+        return None
+    expression = ' '.join(f'"{token}"*' for token in tokens)
+    if columns:
+        expression = '{%s} : (%s)' % (' '.join(columns), expression)
+    return expression
+
+
+def _fallback_filter(terms, columns):
+    fields = {
+        'name': lambda term: Service.name.contains(term),
+        'description': lambda term: Service.description.contains(term),
+        'address': lambda term: Service.address.contains(term),
+        'customer_name': lambda term: Service.customer.has(Customer.user.has(User.name.contains(term))),
+        'professional_name': lambda term: Service.professional.has(Professional.user.has(User.name.contains(term))),
+    }
+    return [or_(*(fields[column](term) for column in columns)) for term in re.findall(r'\w+', terms or '')]
+
+
+def ranked(query, terms, columns=None, limit=SEARCH_LIMIT):
+    expression = match_expression(terms, columns)
+    if expression is None:
+        return []
+
+    if not enabled():
+        return query.filter(*_fallback_filter(terms, columns or COLUMNS)).order_by(Service.id.desc()).limit(limit).all()
+
+    hits = text("SELECT rowid AS id, rank FROM service_search WHERE service_search MATCH :expression") \
+        .bindparams(expression=expression) \
+        .columns(id=Integer, rank=Float) \
+        .subquery('hits')
+    return query.join(hits, hits.c.id == Service.id).order_by(hits.c.rank).limit(limit).all()
+
+
+@click.command('rebuild-search')
+@with_appcontext
+def rebuild_search_command():
+    rebuild()
+    click.echo("Search index rebuilt.")
+
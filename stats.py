@@ -0,0 +1,64 @@
+from sqlalchemy import func, case
+from models import db, Service, ServiceRollup, ProfessionalRollup
+
+STATUSES = ['created', 'pending', 'requested', 'inprogress', 'completed', 'closed']
+
+
+def _summarize(total, avg_rating, counts):
+    accepted = counts.get('inprogress', 0) + counts.get('completed', 0)
+    completion_rate = (counts.get('completed', 0) / accepted) * 100 if accepted > 0 else 0
+
+    return {
+        'total': total,
+        'avg_rating': avg_rating,
+        'counts': counts,
+        'accepted': accepted,
+        'completion_rate': completion_rate,
+    }
+
+
+def service_stats(**filters):
+    # One conditional-aggregation pass instead of a COUNT query per status.
+    status_counts = [func.count(case((Service.status == status, 1))).label(status) for status in STATUSES]
+    row = db.session.query(
+        func.count(Service.id).label('total'),
+        func.avg(Service.rating).label('avg_rating'),
+        *status_counts
+    ).filter_by(**filters).one()
+
+    counts = {status: getattr(row, status) for status in STATUSES}
+    return _summarize(row.total, row.avg_rating, counts)
+
+
+def professional_stats(professional_id):
+    rows = db.session.query(
+        ProfessionalRollup.status,
+        ProfessionalRollup.count,
+        ProfessionalRollup.rating_sum,
+        ProfessionalRollup.rating_count
+    ).filter(ProfessionalRollup.professional_id == professional_id).all()
+
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update({status: count for status, count, _, _ in rows if count})
+    rating_sum = sum(row.rating_sum for row in rows)
+    rating_count = sum(row.rating_count for row in rows)
+    avg_rating = rating_sum / rating_count if rating_count else None
+
+    return _summarize(sum(counts.values()), avg_rating, counts)
+
+
+def name_stats():
+    # Reads the per-name rollups, so the cost follows the number of service
+    # types rather than the size of the service table.
+    rows = db.session.query(
+        ServiceRollup.name,
+        func.sum(ServiceRollup.count),
+        func.sum(ServiceRollup.rating_sum),
+        func.sum(ServiceRollup.rating_count)
+    ).group_by(ServiceRollup.name).having(func.sum(ServiceRollup.count) > 0).all()
+
+    rating_sum = sum(row[2] or 0 for row in rows)
+    rating_count = sum(row[3] or 0 for row in rows)
+    avg_rating = rating_sum / rating_count if rating_count else None
+
+    return [(name, count) for name, count, _, _ in rows], avg_rating
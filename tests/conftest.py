@@ -0,0 +1,119 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# create_app() reads the database and folders from the environment.
+_scratch = tempfile.mkdtemp(prefix='household-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_scratch, 'test.db')
+os.environ['DOCUMENT_FOLDER'] = os.path.join(_scratch, 'documents')
+os.environ['CATALOG_CACHE_DIR'] = os.path.join(_scratch, 'catalog')
+# The hashing cost does not matter for these tests, only the speed does.
+os.environ['PASSWORD_HASH_COST'] = '1000'
+
+PASSWORD = 'secret'
+CATEGORY = 'Cleaning'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from main import create_app
+    import bootstrap
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        bootstrap.init()
+    return app
+
+
+@pytest.fixture(scope='session')
+def people(app):
+    from models import db, User, Customer, Professional
+    import passwords
+
+    with app.app_context():
+        password = passwords.hash_password(PASSWORD)
+        customer = User(name='Test Customer', email='customer@test', password=password, role='customer',
+                        address='1 Test Street 560001', pincode='560001', mobile='9000000000')
+        professional = User(name='Test Professional', email='pro@test', password=password, role='professional',
+                            address='2 Test Road 560002', pincode='560002', mobile='9100000000')
+        db.session.add_all([customer, professional])
+        db.session.flush()
+        db.session.add(Customer(id=customer.id))
+        db.session.add(Professional(id=professional.id, service_domain=CATEGORY, experience=3, status='approved'))
+        db.session.commit()
+        return {'admin': 'admin@example.com', 'customer': customer.email, 'professional': professional.email,
+                'customer_id': customer.id, 'professional_id': professional.id}
+
+
+def login(app, email):
+    client = app.test_client()
+    password = 'admin' if email == 'admin@example.com' else PASSWORD
+    response = client.post('/login', data={'email': email, 'password': password})
+    assert response.status_code == 302 and not response.location.endswith('/login')
+    return client
+
+
+def add_rows(app, people, count):
+    # Rows of every kind the list pages show: customers and their requests,
+    # pending and approved professionals, and services in each state.
+    from models import db, User, Customer, Professional, Service
+
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with app.app_context():
+        start = db.session.query(User).count()
+        for i in range(count):
+            n = start + i
+            customer = User(name=f'Customer {n}', email=f'customer{n}@test', password=PASSWORD, role='customer',
+                            address=f'{n} Street 560001', pincode='560001', mobile='9000000000')
+            professional = User(name=f'Professional {n}', email=f'pro{n}@test', password=PASSWORD,
+                                role='professional', address=f'{n} Road 560003', pincode='560003', mobile='9100000000')
+            db.session.add_all([customer, professional])
+            db.session.flush()
+            db.session.add(Customer(id=customer.id))
+            db.session.add(Professional(id=professional.id, service_domain=CATEGORY, experience=i,
+                                        status='pending' if i % 2 else 'approved'))
+            for status, customer_id, professional_id in (
+                ('created', None, None),
+                ('pending', customer.id, None),
+                ('requested', customer.id, None),
+                ('inprogress', people['customer_id'], people['professional_id']),
+                ('completed', people['customer_id'], people['professional_id']),
+            ):
+                db.session.add(Service(name=CATEGORY, price=100 + i, description=f'{status} {n}',
+                                       address=f'{n} Street 560001', status=status, date_created=now,
+                                       created_by=1, customer_id=customer_id, professional_id=professional_id,
+                                       rating=4 if status == 'completed' else None))
+        db.session.commit()
+
+
+class StatementRecorder:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self)
+
+
+@pytest.fixture
+def record(app):
+    from models import db
+
+    def recorder():
+        with app.app_context():
+            return StatementRecorder(db.engine)
+    return recorder
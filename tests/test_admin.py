@@ -0,0 +1,57 @@
+import pytest
+
+from conftest import login, add_rows
+
+BULK_ROUTES = [
+    ('/manage_requests/bulk', 'service_ids', {'action': 'approve', 'price': '1'}),
+    ('/manage_professionals/bulk', 'professional_ids', {'action': 'accept'}),
+    ('/end_service/bulk', 'service_ids', {}),
+]
+
+
+def ids_with_status(app, model, status):
+    with app.app_context():
+        return [row.id for row in model.query.filter_by(status=status).all()]
+
+
+@pytest.mark.parametrize('path,field,form', BULK_ROUTES)
+def test_bulk_routes_require_admin(app, people, path, field, form):
+    from models import Service, Professional
+
+    add_rows(app, people, 2)
+    model, status = {
+        '/manage_requests/bulk': (Service, 'pending'),
+        '/manage_professionals/bulk': (Professional, 'pending'),
+        '/end_service/bulk': (Service, 'requested'),
+    }[path]
+    before = ids_with_status(app, model, status)
+
+    for client in (app.test_client(), login(app, people['customer'])):
+        response = client.post(path, data=dict(form, **{field: before}))
+        assert response.status_code == 302
+        assert response.location.endswith('/login')
+    assert ids_with_status(app, model, status) == before
+
+
+def test_bulk_review_ignores_invalid_price(app, people):
+    from models import db, Service
+
+    add_rows(app, people, 1)
+    pending = ids_with_status(app, Service, 'pending')[:1]
+    client = login(app, people['admin'])
+    response = client.post('/manage_requests/bulk', data={'service_ids': pending, 'action': 'approve', 'price': 'abc'})
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.get(Service, pending[0]).status == 'requested'
+
+
+def test_review_ignores_invalid_price(app, people):
+    from models import db, Service
+
+    add_rows(app, people, 1)
+    pending = ids_with_status(app, Service, 'pending')[0]
+    client = login(app, people['admin'])
+    response = client.post('/manage_requests', data={'service_id': pending, 'action': 'approve', 'price': 'abc'})
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(Service, pending).status == 'requested'
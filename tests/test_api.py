@@ -0,0 +1,33 @@
+import re
+
+from conftest import login, add_rows
+
+
+def test_admin_summary_is_validated_from_the_rollups(app, people, record):
+    from models import db, Service
+    import transitions
+
+    add_rows(app, people, 1)
+    client = login(app, people['admin'])
+    first = client.get('/api/v1/summary')
+    assert first.status_code == 200 and first.headers['ETag']
+
+    with record() as recorder:
+        again = client.get('/api/v1/summary', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    # Only the rollups are read, never the service table.
+    assert not [statement for statement, _ in recorder.statements if re.search(r'FROM service\b', statement)]
+
+    with app.app_context():
+        service_id = db.session.query(Service.id).filter_by(status='requested').first()[0]
+        transitions.close([service_id])
+        db.session.commit()
+    changed = client.get('/api/v1/summary', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200 and changed.headers['ETag'] != first.headers['ETag']
+
+
+def test_professional_queues_match_the_dashboard(app, people):
+    client = login(app, people['professional'])
+    for queue in ('requested', 'inprogress', 'completed'):
+        assert client.get(f'/api/v1/queue/{queue}').status_code == 200
+    assert client.get('/api/v1/queue/closed').status_code == 404
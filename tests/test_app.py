@@ -0,0 +1,8 @@
+def test_apps_keep_their_own_pools_and_caches(app):
+    import main
+
+    assert not hasattr(main, 'app')
+    admin = main.create_app('admin')
+    assert 'customer' not in admin.blueprints and 'admin' in admin.blueprints
+    for name in ('jobs', 'passwords', 'catalog'):
+        assert admin.extensions[name] is not app.extensions[name]
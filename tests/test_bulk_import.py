@@ -0,0 +1,21 @@
+import io
+
+import bulk_import
+
+
+def test_services_with_unknown_references_are_rejected(app, people):
+    from models import Service
+
+    csv = (
+        "name,price,description,address,customer_id,professional_id\n"
+        f"Cleaning,100,ok,1 Street,{people['customer_id']},{people['professional_id']}\n"
+        "Cleaning,100,bad customer,1 Street,999999,\n"
+        f"Cleaning,100,bad professional,1 Street,,999998\n"
+    )
+    with app.app_context():
+        before = Service.query.count()
+        report = bulk_import.run_import('services', io.BytesIO(csv.encode('utf8')), 'csv')
+        assert report.inserted == 1
+        assert [line for line, _ in report.errors] == [3, 4]
+        assert 'customer_id 999999' in report.errors[0][1]
+        assert Service.query.count() == before + 1
@@ -0,0 +1,17 @@
+import hashlib
+
+import charts
+
+
+def test_unsigned_spec_is_refused(app):
+    spec = charts.encode_spec('status_bar', [['created', 1]])
+    key = hashlib.sha1(spec.encode('ascii')).hexdigest()
+    response = app.test_client().get(f'/charts/{key}.png?d={spec}')
+    assert response.status_code == 404
+
+
+def test_oversized_spec_is_refused(app):
+    spec = charts.encode_spec('status_bar', [[f'bar {i}', i] for i in range(charts.MAX_POINTS + 1)])
+    key = charts.chart_key(spec, app.config['SECRET_KEY'])
+    response = app.test_client().get(f'/charts/{key}.png?d={spec}')
+    assert response.status_code == 404
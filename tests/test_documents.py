@@ -0,0 +1,47 @@
+import io
+import os
+
+from conftest import PASSWORD, CATEGORY
+
+PDF = b'%PDF-1.4\n%signup test\n%%EOF\n'
+
+
+def signup_form(email, content=PDF):
+    return {
+        'name': 'Signup Test', 'email': email, 'password': PASSWORD, 'mobile': '9200000000',
+        'service_domain': CATEGORY, 'experience': '2', 'address': 'Signup Lane', 'pincode': '560001',
+        'documents': (io.BytesIO(content), 'document.pdf'),
+    }
+
+
+def stored_files(app):
+    folder = app.config['DOCUMENT_FOLDER']
+    return {name for _, _, names in os.walk(folder) for name in names}
+
+
+def test_failed_signup_removes_its_document(app, people):
+    client = app.test_client()
+    before = stored_files(app)
+    # The email is taken, so the user insert fails after the file is stored.
+    response = client.post('/professional_signup', data=signup_form(people['customer'], PDF + b'%orphan\n'))
+    assert response.status_code == 302
+    assert stored_files(app) == before
+
+
+def test_signup_keeps_documents_other_professionals_use(app, people):
+    client = app.test_client()
+    assert client.post('/professional_signup', data=signup_form('first-signup@test')).status_code == 302
+    before = stored_files(app)
+    assert before
+    client.post('/professional_signup', data=signup_form(people['customer']))
+    assert stored_files(app) == before
+
+
+def test_signup_without_content_length_is_refused(app):
+    client = app.test_client()
+    response = client.post('/professional_signup', data=signup_form('chunked@test'),
+                           environ_overrides={'CONTENT_LENGTH': '', 'wsgi.input_terminated': True})
+    assert response.status_code == 302
+    with app.app_context():
+        from models import User
+        assert User.query.filter_by(email='chunked@test').first() is None
@@ -0,0 +1,61 @@
+from conftest import login, add_rows
+
+
+def test_table_changes_are_seen_by_other_processes(app, people):
+    # The admin's own process is not told about the change: it comes in
+    # through a separate engine, as from another worker or the CLI.
+    from sqlalchemy import create_engine, text
+    from models import db, Service
+
+    add_rows(app, people, 1)
+    client = login(app, people['admin'])
+    with app.app_context():
+        service_id = db.session.query(Service.id).filter_by(status='requested').order_by(Service.id.desc()).first()[0]
+    assert '1999-01-01 00:00:00' not in client.get('/manage_services').get_data(as_text=True)
+    # date_created is not part of the rollups, which this write skips.
+    other = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+    with other.begin() as connection:
+        connection.execute(text("UPDATE service SET date_created = '1999-01-01 00:00:00' WHERE id = :id"), {'id': service_id})
+        connection.execute(text("UPDATE data_version SET version = version + 1 WHERE name = 'service'"))
+    other.dispose()
+
+    assert '1999-01-01 00:00:00' in client.get('/manage_services').get_data(as_text=True)
+
+
+def test_orm_and_transition_changes_bump_versions(app, people):
+    from models import db, Service
+    import fragments
+    import transitions
+
+    add_rows(app, people, 1)
+    with app.test_request_context():
+        before = fragments.data_version('service', 'professional')
+    with app.app_context():
+        service_id = db.session.query(Service.id).filter_by(status='requested').first()[0]
+        transitions.close([service_id])
+        db.session.commit()
+    with app.test_request_context():
+        after = fragments.data_version('service', 'professional')
+    assert after[0] > before[0] and after[1] == before[1]
+
+
+def test_versions_are_bumped_after_the_writer_commits(app, people):
+    # Inside the writer's transaction the counter row is untouched, so
+    # concurrent writers do not wait on each other for it.
+    from sqlalchemy import select
+    from models import db, Service, DataVersion
+    import transitions
+
+    def service_version():
+        return db.session.execute(select(DataVersion.version).where(DataVersion.name == 'service')).scalar() or 0
+
+    add_rows(app, people, 1)
+    with app.app_context():
+        before = service_version()
+        service_id = db.session.query(Service.id).filter_by(status='requested').first()[0]
+        transitions.close([service_id])
+        db.session.get(Service, service_id).description = 'changed through the ORM'
+        db.session.flush()
+        assert service_version() == before
+        db.session.commit()
+        assert service_version() == before + 1
@@ -0,0 +1,73 @@
+import re
+
+import pytest
+
+from conftest import login, add_rows
+
+# Routes from the filter columns indexed in models.py. Every plan step on
+# service or professional has to be an index search, not a table scan.
+FILTERED_PAGES = [
+    ('professional', '/professional_dashboard'),
+    ('professional', '/professional_search?search_by=date&search_input=2026-01-01'),
+    ('customer', '/customer_dashboard'),
+    ('customer', '/customer_summary'),
+    ('admin', '/manage_requests'),
+    ('admin', '/manage_professionals'),
+]
+TABLE_STEP = re.compile(r'^(SCAN|SEARCH) (service|professional)\b')
+
+
+def plans(app, statements):
+    from models import db
+
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            for statement, parameters in statements:
+                if statement.lstrip().upper().startswith('SELECT'):
+                    rows = connection.cursor().execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+                    yield statement, [row[3] for row in rows]
+        finally:
+            connection.close()
+
+
+@pytest.mark.parametrize('role,path', FILTERED_PAGES)
+def test_route_queries_use_indexes(app, people, record, role, path):
+    add_rows(app, people, 3)
+    client = login(app, people[role])
+    # The first request may build the in-memory matching index, which reads
+    # whole tables on purpose.
+    client.get(path)
+    with record() as recorder:
+        assert client.get(path).status_code == 200
+
+    for statement, steps in plans(app, recorder.statements):
+        for step in steps:
+            if TABLE_STEP.match(step):
+                assert step.startswith('SEARCH'), f"{path} scans a table: {step}\n{statement}"
+
+
+def test_migrate_is_repeatable(app):
+    # create_all() already made the expression index; migrate() must not try
+    # to create it again.
+    from models import db, init_db
+    from sqlalchemy import text
+
+    with app.app_context():
+        init_db()
+        init_db()
+        names = db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars().all()
+    assert 'ix_service_created_day' in names
+    assert 'ix_service_name_status' in names
+
+
+def test_postgresql_schema_skips_the_expression_index(app):
+    from sqlalchemy import create_mock_engine
+    from models import db
+
+    statements = []
+    engine = create_mock_engine('postgresql://', lambda sql, *args, **kw: statements.append(str(sql.compile(dialect=engine.dialect))))
+    db.metadata.create_all(engine, checkfirst=False)
+    indexes = [statement for statement in statements if 'CREATE INDEX' in statement]
+    assert 'ix_service_name_status' in ' '.join(indexes)
+    assert not any('date(' in statement for statement in indexes)
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import login, add_rows
+import jobs
+
+
+def test_summary_pages_do_not_write_job_rows(app, people):
+    from models import Job
+
+    add_rows(app, people, 1)
+    with app.app_context():
+        before = Job.query.count()
+    for role, path in (('customer', '/customer_summary'), ('professional', '/professional_summary'),
+                       ('admin', '/admin_summary')):
+        assert login(app, people[role]).get(path).status_code == 200
+    with app.app_context():
+        assert Job.query.count() == before
+
+
+def test_purge_removes_only_old_finished_jobs(app):
+    from models import db, Job
+
+    old = (datetime.now() - timedelta(seconds=app.config['JOB_RETENTION_SECONDS'] + 60)).strftime('%Y-%m-%d %H:%M:%S')
+    with app.app_context():
+        rows = [
+            Job(kind='rebuild_rollups', status='done', date_created=old, date_finished=old),
+            Job(kind='rebuild_rollups', status='failed', date_created=old, date_finished=old),
+            Job(kind='rebuild_rollups', status='done', date_created=jobs.now(), date_finished=jobs.now()),
+            Job(kind='rebuild_rollups', status='running', date_created=old, date_started=old),
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        ids = [row.id for row in rows]
+
+        jobs.purge()
+        remaining = {row.id for row in Job.query.filter(Job.id.in_(ids))}
+    assert remaining == set(ids[2:])
+
+
+def test_document_check_is_shown_to_the_admin(app, people, tmp_path):
+    from models import db, Professional
+
+    add_rows(app, people, 2)
+    bad = tmp_path / 'bad.pdf'
+    bad.write_bytes(b'not a pdf')
+    good = tmp_path / 'good.pdf'
+    good.write_bytes(b'%PDF-1.4\n%%EOF\n')
+    with app.app_context():
+        invalid, valid = [row[0] for row in db.session.query(Professional.id).filter_by(status='pending').limit(2)]
+        for professional_id in (invalid, valid):
+            db.session.get(Professional, professional_id).documents = 'a' * 64
+        db.session.commit()
+
+        with pytest.raises(ValueError):
+            jobs.validate_document(invalid, str(bad))
+        assert jobs.validate_document(valid, str(good))['size'] == good.stat().st_size
+        assert db.session.get(Professional, invalid).document_status == 'invalid'
+        assert db.session.get(Professional, valid).document_status == 'valid'
+
+    page = login(app, people['admin']).get('/manage_professionals?pending_per_page=100').get_data(as_text=True)
+    assert 'Invalid: Document is not a PDF file.' in page
+    assert 'Checked' in page
@@ -0,0 +1,30 @@
+from conftest import CATEGORY, add_rows
+
+
+def test_orm_changes_reach_the_catalog_and_the_feed(app, people):
+    from models import db, Service
+    import catalog
+    import feed
+
+    add_rows(app, people, 1)
+    topic = feed.domain_topic(CATEGORY)
+    subscriber = feed.hub.subscribe([topic])
+    try:
+        with app.app_context():
+            service = Service.query.filter_by(name=CATEGORY, status='created').first()
+            assert service.id in {entry.id for entry in catalog.entries(CATEGORY)}
+
+            service.price = 12345
+            db.session.commit()
+            assert {entry.price for entry in catalog.entries(CATEGORY) if entry.id == service.id} == {12345}
+
+            service.status = 'requested'
+            service.customer_id = people['customer_id']
+            db.session.commit()
+            assert service.id not in {entry.id for entry in catalog.entries(CATEGORY)}
+
+        event_id, data = subscriber.get_nowait()
+        assert data['id'] == service.id and data['status'] == 'requested' and data['previous_status'] == 'created'
+        assert subscriber.empty()
+    finally:
+        feed.hub.unsubscribe([topic], subscriber)
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from conftest import CATEGORY
+import matching
+
+
+def add_request(app, people, updated_at):
+    from models import db, Service
+
+    with app.app_context():
+        service = Service(name=CATEGORY, price=100, description='late commit', address='3 Late Street 560001',
+                          status='requested', created_by=1, customer_id=people['customer_id'], updated_at=updated_at,
+                          date_created=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        db.session.add(service)
+        db.session.commit()
+        return service.id
+
+
+def open_ids(app):
+    professional = SimpleNamespace(service_domain=CATEGORY, pincode='560001')
+    with app.test_request_context():
+        return {entry.id for entry in matching.jobs_for(professional, limit=1000)}
+
+
+def test_sync_picks_up_writes_that_commit_late(app, people):
+    open_ids(app)
+    # Its UPDATE ran well before the index's watermark, but it only
+    # committed now.
+    service_id = add_request(app, people, datetime.utcnow() - timedelta(seconds=30))
+    matching._sync_due = True
+    assert service_id in open_ids(app)
+
+
+def test_rebuild_runs_in_the_background(app, people, monkeypatch):
+    open_ids(app)
+    scheduled = []
+    monkeypatch.setattr(matching.jobs, 'background', lambda func, *args: scheduled.append(func) or True)
+    monkeypatch.setitem(app.config, 'MATCHING_REBUILD_SECONDS', 0)
+    before = matching._last_rebuild
+
+    open_ids(app)
+    assert scheduled == [matching.rebuild_in_background]
+    assert matching._last_rebuild == before
+
+    with app.app_context():
+        scheduled[0]()
+    assert matching._last_rebuild != before and not matching._rebuilding
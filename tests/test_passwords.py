@@ -0,0 +1,67 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from conftest import login, PASSWORD
+
+
+def add_user(app, email, password):
+    from models import db, User, Customer
+
+    with app.app_context():
+        user = User(name='Rehash Customer', email=email, password=password, role='customer',
+                    address='3 Test Lane 560001', pincode='560001', mobile='9000000000')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Customer(id=user.id))
+        db.session.commit()
+
+
+def stored_password(app, email):
+    from models import User
+
+    with app.app_context():
+        return User.query.filter_by(email=email).one().password
+
+
+def test_hash_and_verify(app):
+    import passwords
+
+    with app.app_context():
+        stored = passwords.hash_password(PASSWORD)
+        assert passwords.is_hashed(stored)
+        assert stored.startswith(passwords.method() + '$')
+        assert not passwords.needs_rehash(stored)
+        assert passwords.verify(stored, PASSWORD)
+        assert not passwords.verify(stored, 'wrong')
+        assert not passwords.verify(None, PASSWORD)
+        assert passwords.needs_rehash(PASSWORD)
+
+
+@pytest.mark.parametrize('email,password', [
+    ('plaintext@test', PASSWORD),
+    ('cheap@test', generate_password_hash(PASSWORD, 'pbkdf2:sha256:500')),
+])
+def test_login_rehashes_with_current_method(app, email, password):
+    import passwords
+
+    add_user(app, email, password)
+    response = app.test_client().post('/login', data={'email': email, 'password': 'wrong'})
+    assert response.location.endswith('/login')
+    assert stored_password(app, email) == password
+
+    login(app, email)
+    stored = stored_password(app, email)
+    with app.app_context():
+        assert stored.startswith(passwords.method() + '$')
+        assert passwords.verify(stored, PASSWORD)
+    login(app, email)
+    assert stored_password(app, email) == stored
+
+
+@pytest.mark.parametrize('algorithm', ['scrypt', 'pbkdf2', 'pbkdf2:nosuchhash'])
+def test_unsupported_algorithm_is_refused(monkeypatch, algorithm):
+    from main import create_app
+
+    monkeypatch.setenv('PASSWORD_HASH_ALGORITHM', algorithm)
+    with pytest.raises(ValueError, match='PASSWORD_HASH_ALGORITHM'):
+        create_app()
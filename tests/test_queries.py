@@ -0,0 +1,40 @@
+import pytest
+
+from conftest import login, add_rows
+
+# role -> paths whose statement count must not grow with the rows shown.
+LIST_PAGES = [
+    ('admin', '/admin_dashboard'),
+    ('admin', '/manage_services'),
+    ('admin', '/manage_requests'),
+    ('admin', '/manage_professionals'),
+    ('admin', '/manage_customers'),
+    ('admin', '/admin_search?search_input=Cleaning'),
+    ('customer', '/customer_dashboard'),
+    ('customer', '/get_services?category=Cleaning'),
+    ('professional', '/professional_dashboard'),
+    ('professional', '/professional_search?search_by=location&search_input=Street'),
+]
+
+
+def count_statements(client, record, path):
+    # Early requests also fill per-process caches (identity, matching index,
+    # catalog), so requests are repeated until the count settles.
+    counts = []
+    for _ in range(5):
+        with record() as recorder:
+            assert client.get(path).status_code == 200
+        counts.append(len(recorder.statements))
+        if len(counts) > 1 and counts[-1] == counts[-2]:
+            break
+    return counts[-1]
+
+
+@pytest.mark.parametrize('role,path', LIST_PAGES)
+def test_statement_count_does_not_grow_with_rows(app, people, record, role, path):
+    client = login(app, people[role])
+    add_rows(app, people, 2)
+    few = count_statements(client, record, path)
+    add_rows(app, people, 6)
+    many = count_statements(client, record, path)
+    assert many == few, f"{path}: {few} statements with few rows, {many} with more"
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from conftest import add_rows
+
+
+def new_service(status='created', customer_id=None):
+    from models import db, Service
+
+    service = Service(name='Plumbing', price=100, description='rollup test', address='1 Street 560001',
+                      status=status, created_by=1, customer_id=customer_id,
+                      date_created=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    db.session.add(service)
+    db.session.commit()
+    return service.id
+
+
+def test_transitions_keep_rollups_in_step(app, people):
+    from models import db, Service
+    import rollups
+    import transitions
+
+    add_rows(app, people, 1)
+    with app.app_context():
+        assert rollups.check() == []
+
+        booked = new_service()
+        assert transitions.book(booked, people['customer_id'])
+        db.session.commit()
+        assert transitions.accept(booked, people['professional_id'])
+        db.session.commit()
+        assert transitions.complete(booked, people['customer_id'], 4, 'Done')
+        db.session.commit()
+        assert rollups.check() == []
+
+        approved = new_service('pending', people['customer_id'])
+        rejected = new_service('pending', people['customer_id'])
+        assert transitions.review([approved], 'approve', price=150) == [approved]
+        assert transitions.review([rejected], 'reject') == [rejected]
+        assert transitions.close([approved]) == [approved]
+        db.session.commit()
+        assert rollups.check() == []
+
+        # ORM edits go through the flush hook instead.
+        service = db.session.get(Service, new_service())
+        service.status = 'closed'
+        db.session.commit()
+        db.session.delete(service)
+        db.session.commit()
+        assert rollups.check() == []
+
+
+def test_rolled_back_transitions_leave_rollups_alone(app, people):
+    from models import db
+    import rollups
+    import transitions
+
+    with app.app_context():
+        service_id = new_service()
+        assert transitions.book(service_id, people['customer_id'])
+        db.session.rollback()
+        assert rollups.check() == []
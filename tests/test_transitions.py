@@ -0,0 +1,39 @@
+import threading
+
+from conftest import add_rows
+
+
+def test_concurrent_accepts_assign_the_service_once(app, people):
+    # Two professionals accept the same request at the same moment, each in
+    # its own thread, session and connection.
+    from models import db, Service, Professional
+    import rollups
+    import transitions
+
+    add_rows(app, people, 1)
+    with app.app_context():
+        service_id = db.session.query(Service.id).filter_by(status='requested', professional_id=None).first()[0]
+        professional_ids = [row[0] for row in db.session.query(Professional.id).filter_by(status='approved').limit(2)]
+    assert len(professional_ids) == 2
+
+    barrier = threading.Barrier(len(professional_ids))
+    results = {}
+
+    def accept(professional_id):
+        with app.app_context():
+            barrier.wait()
+            results[professional_id] = transitions.accept(service_id, professional_id)
+            db.session.commit()
+
+    threads = [threading.Thread(target=accept, args=(professional_id,)) for professional_id in professional_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [professional_id for professional_id, accepted in results.items() if accepted]
+    assert len(results) == 2 and len(winners) == 1
+    with app.app_context():
+        service = db.session.get(Service, service_id)
+        assert (service.status, service.professional_id) == ('inprogress', winners[0])
+        assert rollups.check() == []
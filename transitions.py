@@ -0,0 +1,97 @@
+from sqlalchemy import update
+from models import db, Service, Professional
+import rollups
+
+# Every transition is a single conditional UPDATE. The WHERE clause carries
+# the precondition, so of two concurrent requests exactly one matches the
+# row and the other sees a rowcount of zero without a read-modify-write.
+
+OPEN_STATUSES = ['requested', 'pending', 'inprogress']
+
+# Modules that follow service or professional changes register here, see
+# catalog.py, feed.py and matching.py. Service listeners are called with
+# (session, service_id, old, new) states, for the Core UPDATEs below and for
+# ORM flushes alike (rollups.track_service_changes); old is None for a new
+# service and new is None for a deleted one. Professional listeners are
+# called with (session, professional_ids) for the UPDATEs below only.
+service_listeners = []
+professional_listeners = []
+
+
+def _transition(service_ids, from_statuses, values, *conditions):
+    changed = []
+    for from_status in from_statuses:
+        remaining = [service_id for service_id in service_ids if service_id not in changed]
+        if not remaining:
+            break
+        stmt = update(Service) \
+            .where(Service.id.in_(remaining), Service.status == from_status, *conditions) \
+            .values(**values) \
+            .returning(Service.id, Service.name, Service.professional_id, Service.status, Service.rating) \
+            .execution_options(synchronize_session=False)
+        rows = db.session.execute(stmt).all()
+
+        # The rollups and the listeners are fed here from the RETURNING row
+        # and the known previous status.
+        connection = db.session.connection()
+        for service_id, name, professional_id, status, rating in rows:
+            old_professional_id = None if 'professional_id' in values else professional_id
+            old_rating = None if 'rating' in values else rating
+            old = rollups.state_of(name, old_professional_id, from_status, old_rating)
+            new = rollups.state_of(name, professional_id, status, rating)
+            rollups.apply_change(connection, old, new)
+            for listener in service_listeners:
+                listener(db.session, service_id, old, new)
+            changed.append(service_id)
+
+    # Instances already loaded in this session would otherwise keep the old
+    # status until the next commit.
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Service) and obj.id in changed:
+            db.session.expire(obj)
+    return changed
+
+
+def book(service_id, customer_id):
+    return bool(_transition([service_id], ['created'], {'customer_id': customer_id, 'status': 'requested'},
+                            Service.customer_id == None))
+
+
+def accept(service_id, professional_id):
+    return bool(_transition([service_id], ['requested'], {'professional_id': professional_id, 'status': 'inprogress'},
+                            Service.professional_id == None))
+
+
+def complete(service_id, customer_id, rating, remarks):
+    return bool(_transition([service_id], OPEN_STATUSES, {'rating': rating, 'remarks': remarks, 'status': 'completed'},
+                            Service.customer_id == customer_id))
+
+
+def review(service_ids, action, **values):
+    # Admin decision on a customer's pending request.
+    values['status'] = 'requested' if action in ('approve', 'accept') else 'closed'
+    return _transition(service_ids, ['pending'], values)
+
+
+def close(service_ids, from_statuses=OPEN_STATUSES):
+    return _transition(service_ids, from_statuses, {'status': 'closed'})
+
+
+PROFESSIONAL_ACTIONS = {
+    'accept': (['pending'], 'approved'),
+    'reject': (['pending'], 'rejected'),
+    'block': (['approved'], 'blocked'),
+}
+
+
+def set_professional_status(professional_ids, action):
+    from_statuses, status = PROFESSIONAL_ACTIONS[action]
+    stmt = update(Professional) \
+        .where(Professional.id.in_(professional_ids), Professional.status.in_(from_statuses)) \
+        .values(status=status) \
+        .returning(Professional.id) \
+        .execution_options(synchronize_session=False)
+    changed = [row[0] for row in db.session.execute(stmt)]
+    for listener in professional_listeners:
+        listener(db.session, changed)
+    return changed
@@ -0,0 +1,5 @@
+from main import create_app
+
+# `gunicorn wsgi:app` serves the blueprints named in APP_BLUEPRINTS (all of
+# them by default). Importing main alone builds no application.
+app = create_app()